@@ -1,12 +1,17 @@
 import asyncio
 import logging
 from datetime import date, datetime, timedelta
+from functools import partial
 from typing import Any, Optional
 
 import pytz
 
 from hltv_async_api.methods import Matches, Events, Teams, Players, News
-from hltv_async_api.types import Client, Executor, Parser
+from hltv_async_api.types import Client, Executor, Parser, SingleFlight, RetryPolicy, Transport
+from hltv_async_api.types.Deadline import with_deadline
+from hltv_async_api.types.Cache import page_age
+from hltv_async_api.types.Scheduler import priority, current as current_priority
+from hltv_async_api.types.Backend import RawPage
 
 
 class Hltv:
@@ -26,8 +31,51 @@ class Hltv:
                  tz: str | None = None,
                  safe_mode: bool = False,
                  debug: bool = False,
+                 cache: bool = False,
+                 cache_size: int = 256,
+                 cache_path: str | None = None,
+                 cache_ttl: dict | None = None,
+                 rate_limit: float | None = None,
+                 rate_burst: int = 1,
+                 rate_limits: dict | None = None,
+                 rate_fair: bool = True,
+                 proxy_max_failures: int = 3,
+                 proxy_cooldown: float = 30.0,
+                 connection_limit: int = 100,
+                 connection_limit_per_host: int = 0,
+                 keepalive_timeout: float = 15.0,
+                 dns_cache_ttl: int | None = 10,
+                 preconnect: int = 0,
+                 hedge: bool = False,
+                 hedge_percentile: float = 0.95,
+                 hedge_delay: float = 1.0,
+                 stream: bool = False,
+                 retry_policy: RetryPolicy | None = None,
+                 backoff: bool = False,
+                 retry_budget: float | None = None,
+                 page_markers: dict | None = None,
+                 transport: str | Transport = 'aiohttp',
+                 proxy_slots: int = 0,
+                 proxy_preflight: bool = False,
+                 proxy_watch: float | None = None,
+                 stale_while_revalidate: bool = False,
+                 max_stale: float = 0,
+                 negative_ttl: float = 0,
+                 circuit_threshold: int = 0,
+                 circuit_reset: float = 30.0,
+                 identity_path: str | None = None,
+                 adaptive: bool = False,
+                 adaptive_initial: int = 4,
+                 adaptive_max: int = 64,
+                 scheduler_slots: int = 0,
+                 scheduler_reserve: int | None = None,
+                 backend: str = 'bs4',
+                 deadline: float | None = None,
+                 parse_processes: int | bool = False,
+                 max_tasks_per_child: int = 500,
                  ):
         self.DEBUG = debug
+        self.DEADLINE = deadline
         self._configure_logging()
         self.logger = logging.getLogger(__name__)
         self.loop = asyncio.get_running_loop()
@@ -44,13 +92,54 @@ class Hltv:
                             proxy_list,
                             proxy_delay,
                             proxy_protocol,
-                            remove_proxy, logger=self.logger)
+                            remove_proxy,
+                            logger=self.logger,
+                            cache=cache,
+                            cache_size=cache_size,
+                            cache_path=cache_path,
+                            cache_ttl=cache_ttl,
+                            rate_limit=rate_limit,
+                            rate_burst=rate_burst,
+                            rate_limits=rate_limits,
+                            rate_fair=rate_fair,
+                            proxy_max_failures=proxy_max_failures,
+                            proxy_cooldown=proxy_cooldown,
+                            connection_limit=connection_limit,
+                            connection_limit_per_host=connection_limit_per_host,
+                            keepalive_timeout=keepalive_timeout,
+                            dns_cache_ttl=dns_cache_ttl,
+                            preconnect=preconnect,
+                            hedge=hedge,
+                            hedge_percentile=hedge_percentile,
+                            hedge_delay=hedge_delay,
+                            stream=stream,
+                            retry_policy=retry_policy,
+                            backoff=backoff,
+                            retry_budget=retry_budget,
+                            page_markers=page_markers,
+                            transport=transport,
+                            proxy_slots=proxy_slots,
+                            proxy_preflight=proxy_preflight,
+                            proxy_watch=proxy_watch,
+                            stale_while_revalidate=stale_while_revalidate,
+                            max_stale=max_stale,
+                            negative_ttl=negative_ttl,
+                            circuit_threshold=circuit_threshold,
+                            circuit_reset=circuit_reset,
+                            identity_path=identity_path,
+                            adaptive=adaptive,
+                            adaptive_initial=adaptive_initial,
+                            adaptive_max=adaptive_max,
+                            scheduler_slots=scheduler_slots,
+                            scheduler_reserve=scheduler_reserve,
+                            backend=backend)
 
         self.client = client
         self.session = self.client.get_session()
 
         if executor is None:
-            executor = Executor(loop=self.loop, logger=self.logger)
+            executor = Executor(loop=self.loop, logger=self.logger,
+                                processes=parse_processes, max_tasks_per_child=max_tasks_per_child)
 
         self.EXECUTOR = executor
 
@@ -58,6 +147,7 @@ class Hltv:
             parser = Parser(self.client, self.EXECUTOR, self.logger)
 
         self.PARSER = parser
+        self.FLIGHT = SingleFlight()
 
         self.SAFE = safe_mode
         self._init_safe()
@@ -69,15 +159,40 @@ class Hltv:
         self.NEWS = News(self.TIMEZONE)
 
     async def __aenter__(self):
+        if self.client.PROXY_PREFLIGHT:
+            await self.client.preflight()
+        if self.client.PROXY_WATCH:
+            self.client.watch_proxies()
+        if self.client.PRECONNECT:
+            await self.client.preconnect()
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         await self.close()
 
+    @property
+    def age(self) -> float | None:
+        """age in seconds of the page behind the last result in this task, 0 - fresh download"""
+        return page_age.get()
+
+    @staticmethod
+    def priority(level: str):
+        """
+        Context manager, requests made inside run with this priority (needs scheduler_slots)
+        :params:
+        level - 'high' | 'normal' | 'low'
+        """
+        return priority(level)
+
     async def close(self):
+        for task in self.PARSER.refreshes:
+            task.cancel()
+        if self.PARSER.saving is not None:
+            # final dump in close_session must not be overwritten by an older snapshot
+            await self.PARSER.saving
         if self.session:
             self.logger.debug('Closing Session')
-            await self.client.session.close()
+            await self.client.close_session()
             self.session = None
         if self.EXECUTOR:
             self.EXECUTOR.close()
@@ -99,11 +214,79 @@ class Hltv:
             },
         )
 
-    async def _run(self, func, *args, **kwargs):
-        return await self.EXECUTOR.run(func, *args, **kwargs)
+    async def _get(self, url: str, func, *args, until=None, only=None):
+        """fetches url and runs extractor func(page, *args), parse + extract is one executor task"""
+        # callers asking for the same page with same arguments share one extraction
+        key = (url, func, args)
+        if self.client.scheduler is not None:
+            # shared task queues with the priority of its first caller, lanes don't share
+            key += (current_priority(),)
+        try:
+            hash(key)
+        except TypeError:
+            return await self._fetch(url, until, only, (func, args))
+
+        async def _shared():
+            return await self._fetch(url, until, only, (func, args)), page_age.get()
+
+        result, age = await self.FLIGHT.do(key, _shared)
+        page_age.set(age)
+        return result
+
+    async def _fetch(self, url: str, until=None, only=None, extract=None) -> Optional[str]:
+        return await self.PARSER.fetch(url, 0, until, only, extract)
+
+    async def _page(self, url: str):
+        r = await self._fetch(url)
+        if isinstance(r, RawPage):
+            return await self.EXECUTOR.run(r.parse, self.client.backend)
+        return r
+
+    def _call(self, spec):
+        if isinstance(spec, str):
+            return self._page(spec)
+        func, *args = spec if isinstance(spec, (tuple, list)) else (spec,)
+        if isinstance(func, str):
+            func = getattr(self, func)
+        return func(*args)
+
+    async def iter_many(self, calls: list, concurrency: int = 10):
+        """
+        Same as fetch_many, yields (index, result) as soon as every call completes
+        """
+        semaphore = asyncio.Semaphore(concurrency)
 
-    async def _fetch(self, url: str) -> Optional[str]:
-        return await self.PARSER.fetch(url, 0)
+        async def _one(i, spec):
+            async with semaphore:
+                try:
+                    return i, await self._call(spec)
+                except Exception as e:
+                    self.logger.debug(f'Batch call {i} failed: {e!r}')
+                    return i, e
+
+        tasks = [asyncio.ensure_future(_one(i, spec)) for i, spec in enumerate(calls)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @with_deadline
+    async def fetch_many(self, calls: list, concurrency: int = 10) -> list:
+        """
+        Runs many calls with bounded concurrency, results in the same order as calls
+        :params:
+        calls - urls (returns parsed pages) or call specs:
+            ('get_team_info', 6667, 'faze') | (hltv.get_results, 2) | partial(hltv.get_results, days=2)
+        concurrency - max calls at once
+        :return:
+        [result | Exception] - failed call returns its exception, others are not affected
+        """
+        results = [None] * len(calls)
+        async for i, result in self.iter_many(calls, concurrency):
+            results[i] = result
+        return results
 
     """    
     def config(
@@ -168,6 +351,7 @@ class Hltv:
             self.logger.error('Safe mode is activated. Function is locked')
             return True
 
+    @with_deadline
     async def get(self, type: str, id: int | str | None = None,
                   title: str | None = None,
                   team1: str | None = None,
@@ -190,17 +374,17 @@ class Hltv:
             else:
                 return await self.get_top_teams()
 
+    @with_deadline
     async def get_matches(self, days: int = 1, min_rating: int = 1, live: bool = True, future: bool = True):
         """returns a list of all upcoming matches on HLTV"""
 
         if self._checksafe():
             return
 
-        r = await self._fetch("https://www.hltv.org/matches")
-
-        if r:
-            return await self._run(self.MATCHES.get_matches, r, days, min_rating, live, future)
+        return await self._get("https://www.hltv.org/matches", self.MATCHES.get_matches,
+                               days, min_rating, live, future, only=self.MATCHES.matches_only())
 
+    @with_deadline
     async def get_match_info(self, id_: str | int,
                              team1: str,
                              team2: str,
@@ -210,13 +394,13 @@ class Hltv:
         if self._checksafe():
             return
 
-        r = await self._fetch(f"https://www.hltv.org/matches/{str(id_)}/"
-                              f"{team1.replace(' ', '-')}-vs-"
-                              f"{team2.replace(' ', '-')}-"
-                              f"{event_title.replace(' ', '-')}")
-        if r:
-            return await self._run(self.MATCHES.get_match_info, r, id_, team1, team2, event_title, stats, predicts)
+        return await self._get(f"https://www.hltv.org/matches/{str(id_)}/"
+                               f"{team1.replace(' ', '-')}-vs-"
+                               f"{team2.replace(' ', '-')}-"
+                               f"{event_title.replace(' ', '-')}",
+                               self.MATCHES.get_match_info, id_, team1, team2, event_title, stats, predicts)
 
+    @with_deadline
     async def get_results(self, days: int = 1,
                           min_rating: int = 1,
                           max: int = 30,
@@ -227,24 +411,28 @@ class Hltv:
         if self._checksafe():
             return
 
-        r = await self._fetch("https://www.hltv.org/results")
-        if r:
-            return await self._run(self.MATCHES.get_results, r, days, min_rating, max, featured, regular)
+        return await self._get("https://www.hltv.org/results",
+                               self.MATCHES.get_results, days, min_rating, max, featured, regular,
+                               until=self.MATCHES.results_until(days, max, featured, regular, min_rating),
+                               only=self.MATCHES.results_only())
 
+    @with_deadline
     async def get_event_results(self, event_id: int | str, days: int = 1, max_: int = 10) -> list[
                                                                                                  dict[str, Any]] | None:
 
         if self._checksafe():
             return
 
-        r = await self._fetch("https://www.hltv.org/results?event=" + str(event_id))
-        if r:
-            return await self._run(self.EVENTS.get_event_results, r, event_id, days, max_)
+        return await self._get("https://www.hltv.org/results?event=" + str(event_id),
+                               self.EVENTS.get_event_results, event_id, days, max_,
+                               until=self.EVENTS.event_results_until(days, max_),
+                               only=self.EVENTS.event_results_only())
 
+    @with_deadline
     async def get_event_matches(self, event_id: str | int, days: int = 1):
-        r = await self._fetch("https://www.hltv.org/events/" + str(event_id) + "/matches")
-        if r:
-            return await self._run(self.EVENTS.get_event_matches, r, event_id, days)
+        return await self._get("https://www.hltv.org/events/" + str(event_id) + "/matches",
+                               self.EVENTS.get_event_matches, event_id, days,
+                               only=self.EVENTS.event_matches_only())
 
     #DELETE ? // repair ??
     """async def get_featured_events(self, max_: int = 1):
@@ -275,6 +463,7 @@ class Hltv:
 
         return events"""
 
+    @with_deadline
     async def get_events(self, outgoing=True, future=True, max_events=10):
         """Returns events
         :params:
@@ -285,15 +474,14 @@ class Hltv:
         [('id', 'title', 'startdate', 'enddate')]
         """
 
-        r = await self._fetch('https://www.hltv.org/events')
-        if r:
-            return await self._run(self.EVENTS.get_events, r, outgoing, future, max_events)
+        return await self._get('https://www.hltv.org/events', self.EVENTS.get_events, outgoing, future, max_events)
 
+    @with_deadline
     async def get_event_info(self, event_id: str | int, event_title: str):
-        r = await self._fetch(f"https://hltv.org/events/{str(event_id)}/{event_title.replace(' ', '-')}")
-        if r:
-            return await self._run(self.EVENTS.get_event_info, r, event_id, event_title)
+        return await self._get(f"https://hltv.org/events/{str(event_id)}/{event_title.replace(' ', '-')}",
+                               self.EVENTS.get_event_info, event_id, event_title)
 
+    @with_deadline
     async def get_top_teams(self, max_teams=30, date_str: str = ''):
         """
         returns a list of the top 1-30 teams
@@ -308,11 +496,12 @@ class Hltv:
         current_weekday = day.weekday()
         last_monday = day - timedelta(days=current_weekday)
 
-        r = await self._fetch("https://www.hltv.org/ranking/teams/" + last_monday.strftime('%Y/%B/%d').lower())
-
-        if r:
-            return await self._run(self.TEAMS.get_top_teams, r, max_teams)
+        return await self._get("https://www.hltv.org/ranking/teams/" + last_monday.strftime('%Y/%B/%d').lower(),
+                               self.TEAMS.get_top_teams, max_teams,
+                               until=self.TEAMS.top_teams_until(max_teams),
+                               only=self.TEAMS.top_teams_only())
 
+    @with_deadline
     async def get_team_info(self, team_id: int | str, title: str) -> dict[str, list[str]] | None:
         """
         Returns Information about team
@@ -323,11 +512,10 @@ class Hltv:
         (team_id, title, rank, players, coach, age, weeks, last_trophy, total_trophies) | None
         weeks - weeks in top 20
         """
-        r = await self._fetch("https://www.hltv.org/team/" + str(team_id) + '/' + title.replace(' ', '-'))
-
-        if r:
-            return await self._run(self.TEAMS.get_team_info, r, team_id, title)
+        return await self._get("https://www.hltv.org/team/" + str(team_id) + '/' + title.replace(' ', '-'),
+                               self.TEAMS.get_team_info, team_id, title)
 
+    @with_deadline
     async def get_top_players(self, top: int = 40, year: str | int = datetime.strftime(datetime.utcnow(), '%Y')):
         """
         returns a list of the top (1-40) players in top 20 at the year
@@ -340,26 +528,41 @@ class Hltv:
         if self._checksafe():
             return
 
-        r = await self._fetch(
-            f"https://www.hltv.org/stats/players?startDate={year}-01-01&endDate={year}-12-31&rankingFilter=Top20")
-
-        if r:
-            return await self._run(self.PLAYERS.get_top_players, r, top)
+        return await self._get(
+            f"https://www.hltv.org/stats/players?startDate={year}-01-01&endDate={year}-12-31&rankingFilter=Top20",
+            self.PLAYERS.get_top_players, top, only=self.PLAYERS.top_players_only())
 
+    @with_deadline
     async def get_player_info(self, id: int | str, nickname: str):
-        r = await self._fetch(f'https://www.hltv.org/player/{str(id)}/{nickname}')
-
-        if not r:
-            return
-
-        return await self._run(self.PLAYERS.get_player_info, r, id, nickname)
+        return await self._get(f'https://www.hltv.org/player/{str(id)}/{nickname}',
+                               self.PLAYERS.get_player_info, id, nickname)
 
+    @with_deadline
     async def get_last_news(self, max_reg_news=2, only_today=True, only_featured=False):
 
-        r = await self._fetch('https://www.hltv.org/')
-
-        if r:
-            return await self._run(self.NEWS.get_last_news, r, max_reg_news, only_today, only_featured)
+        return await self._get('https://www.hltv.org/', self.NEWS.get_last_news,
+                               max_reg_news, only_today, only_featured, only=self.NEWS.last_news_only())
+
+    @with_deadline
+    async def get_matches_info(self, matches: list, concurrency: int = 10, **kwargs) -> list:
+        """batch get_match_info, matches: [(id, team1, team2, event_title), ...]"""
+        return await self.fetch_many([partial(self.get_match_info, *match, **kwargs) for match in matches],
+                                     concurrency)
+
+    @with_deadline
+    async def get_events_info(self, events: list, concurrency: int = 10) -> list:
+        """batch get_event_info, events: [(event_id, event_title), ...]"""
+        return await self.fetch_many([(self.get_event_info, *event) for event in events], concurrency)
+
+    @with_deadline
+    async def get_teams_info(self, teams: list, concurrency: int = 10) -> list:
+        """batch get_team_info, teams: [(team_id, title), ...]"""
+        return await self.fetch_many([(self.get_team_info, *team) for team in teams], concurrency)
+
+    @with_deadline
+    async def get_players_info(self, players: list, concurrency: int = 10) -> list:
+        """batch get_player_info, players: [(id, nickname), ...]"""
+        return await self.fetch_many([(self.get_player_info, *player) for player in players], concurrency)
 
 
 if __name__ == '__main__':
@@ -1,12 +1,27 @@
 from datetime import datetime
 from typing import Any, List
 from hltv_async_api.Utils import datetools as dt
+from hltv_async_api.types.Stream import StopAfter, AnyOf
+from hltv_async_api.types.Strainer import Only
 
 
 class Events:
     def __init__(self, tz):
         self.TIMEZONE = tz
 
+    @staticmethod
+    def event_results_until(days: int = 1, max_: int = 10):
+        return AnyOf(StopAfter('div', 'results-sublist', days + 1),
+                     StopAfter('div', 'result-con', max_ + 2, outside='big-results'))
+
+    @staticmethod
+    def event_results_only():
+        return Only(('div', 'results-holder'))
+
+    @staticmethod
+    def event_matches_only():
+        return Only(('div', 'liveMatchesSection'), ('div', 'upcomingMatchesSection'))
+
     @staticmethod
     def get_event_results(r, event_id: int | str, days: int = 1, max_: int = 10) -> list[dict[str, Any]] | None:
 
@@ -4,6 +4,37 @@ from datetime import datetime, timedelta
 import pytz
 from bs4 import BeautifulSoup
 from hltv_async_api.Utils import datetools as dt
+from hltv_async_api.types.Stream import StopAfter, AnyOf
+from hltv_async_api.types.Strainer import Only
+from hltv_async_api.types.Schema import Schema, Field
+
+
+EVENT = Field(('div.matchEventName.gtSmartphone-only', 'span.line-clamp-3'), optional=True, default='')
+
+LIVE_MATCHES = Schema('div.liveMatch-container', {
+    'id': Field(attr='data-scorebot-id'),
+    'rating': Field(attr='stars', transform=int),
+    't1_id': Field(attr='team1'),
+    't2_id': Field(attr='team2'),
+    'teams': Field('div.matchTeamName.text-ellipsis', many=True),
+    'maps': Field('div.matchMeta', transform=lambda meta: meta[-1:]),
+    'event': EVENT,
+})
+
+UPCOMING_MATCHES = Schema('div.upcomingMatchesSection', {
+    'date': Field('span.matchDayHeadline', transform=lambda headline: headline.split()[-1]),
+    'matches': Schema('div.upcomingMatch', {
+        'time': Field('div.matchTime'),
+        'rating': Field(attr='stars', transform=int),
+        # TBD matches have no link / team ids
+        'id': Field('a', attr='href', transform=lambda href: href.split('/')[2], optional=True, default=0),
+        't1_id': Field(attr='team1', optional=True, default=0),
+        't2_id': Field(attr='team2', optional=True, default=0),
+        'teams': Field('div.matchTeamName.text-ellipsis', many=True),
+        'maps': Field('div.matchMeta', transform=lambda meta: meta[-1:]),
+        'event': EVENT,
+    }),
+})
 
 
 class Matches:
@@ -15,6 +46,10 @@ class Matches:
         status_ = {'Match over': 0, 'LIVE': 1}
         return status_[status] if status in status_ else 2
 
+    @staticmethod
+    def matches_only():
+        return Only(('div', 'liveMatch-container'), ('div', 'upcomingMatchesSection'))
+
     def get_matches(self, r: BeautifulSoup, days: int = 1, min_rating: int = 1, live: bool = True, future: bool = True):
         """returns a list of all upcoming matches on HLTV"""
 
@@ -22,91 +57,43 @@ class Matches:
 
         try:
             if live:
-                for live_div in r.find_all('div', class_='liveMatch-container'):
-                    rating = int(live_div['stars'])
-                    if rating >= min_rating:
-                        id = live_div['data-scorebot-id']
-                        t1_id = live_div['team1']
-                        t2_id = live_div['team2']
-                        teams = live_div.find_all('div', {'class': 'matchTeamName text-ellipsis'})
-                        team1 = teams[0].text
-                        team2 = teams[1].text
-                        maps = live_div.find('div', {'class': 'matchMeta'}).text[-1:]
-                        try:
-                            event = live_div.find('div', {'class', 'matchEventName gtSmartphone-only'}).text
-                        except AttributeError:
-                            try:
-                                event = live_div.find('span', {'class': 'line-clamp-3'}).text
-                            except AttributeError:
-                                event = ''
-
-                        matches.append({
-                            'id': id,
-                            'date': 'LIVE',
-                            'time': 'LIVE',
-                            'team1': team1,
-                            'team2': team2,
-                            't1_id': t1_id,
-                            't2_id': t2_id,
-                            'maps': maps,
-                            'rating': rating,
-                            'event': event
-                        })
+                for match in LIVE_MATCHES.extract(r):
+                    if match['rating'] < min_rating:
+                        continue
+                    teams = match['teams']
+                    matches.append({
+                        'id': match['id'],
+                        'date': 'LIVE',
+                        'time': 'LIVE',
+                        'team1': teams[0],
+                        'team2': teams[1],
+                        't1_id': match['t1_id'],
+                        't2_id': match['t2_id'],
+                        'maps': match['maps'],
+                        'rating': match['rating'],
+                        'event': match['event']
+                    })
 
             if future:
-                for i, date_div in enumerate(r.find_all('div', {'class': 'upcomingMatchesSection'}), start=1):
-                    if i > days:
-                        break
-                    date_ = date_div.find('span', {'class': 'matchDayHeadline'}).text.split()[-1]
-
-                    for match in date_div.find_all('div', {'class': 'upcomingMatch'}):
-                        time_ = match.find('div', {'class': 'matchTime'}).text
-                        dtime_ = datetime.strptime(date_ + '/' + time_, "%Y-%m-%d/%H:%M")
+                for section in UPCOMING_MATCHES.extract(r, days):
+                    for match in section['matches']:
+                        dtime_ = datetime.strptime(section['date'] + '/' + match['time'], "%Y-%m-%d/%H:%M")
                         dtime = dt.localize_datetime_to_timezone(self.TIMEZONE, date_=dtime_)
-                        rating = int(match['stars'])
-                        if rating >= min_rating:
-                            id_ = 0
-                            t1_id = 0
-                            t2_id = 0
-                            team1 = 'TBD'
-                            team2 = 'TBD'
-
-                            try:
-                                id_ = match.find('a')['href'].split('/')[2]
-                                t1_id = match['team1']
-                                t2_id = match['team2']
-                            except (IndexError, AttributeError, KeyError):
-                                pass
-                            maps = match.find('div', {'class': 'matchMeta'}).text[-1:]
-                            try:
-                                teams = match.find_all('div', {'class': 'matchTeamName text-ellipsis'})
-
-                                team1 = teams[0].text
-                                team2 = teams[1].text
-                            except (IndexError, AttributeError):
-                                pass
-
-                            try:
-                                event = match.find('div', {'class', 'matchEventName gtSmartphone-only'}).text
-                            except AttributeError:
-
-                                try:
-                                    event = match.find('span', {'class': 'line-clamp-3'}).text
-                                except AttributeError:
-                                    event = ''
-
-                            matches.append({
-                                'id': id_,
-                                'date': dtime.strftime('%d-%m-%Y'),
-                                'time': dtime.strftime('%H:%M'),
-                                'team1': team1,
-                                'team2': team2,
-                                't1_id': t1_id,
-                                't2_id': t2_id,
-                                'maps': maps,
-                                'rating': rating,
-                                'event': event
-                            })
+                        if match['rating'] < min_rating:
+                            continue
+                        teams = match['teams']
+                        matches.append({
+                            'id': match['id'],
+                            'date': dtime.strftime('%d-%m-%Y'),
+                            'time': dtime.strftime('%H:%M'),
+                            'team1': teams[0] if teams else 'TBD',
+                            'team2': teams[1] if len(teams) > 1 else 'TBD',
+                            't1_id': match['t1_id'],
+                            't2_id': match['t2_id'],
+                            'maps': match['maps'],
+                            'rating': match['rating'],
+                            'event': match['event']
+                        })
 
         except AttributeError:
             return None
@@ -232,6 +219,21 @@ class Matches:
         match_info['score1'], match_info['score2'] = score1, score2
         return match_info
 
+    @staticmethod
+    def results_until(days: int = 1, max: int = 30, featured: bool = True, regular: bool = True,
+                      min_rating: int = 1):
+        if not regular:
+            return StopAfter('div', 'big-results')
+        # first sublist is the featured one, result-con has a spare for n > max check,
+        # only results get_results keeps (enough stars) are counted
+        having = ('i', 'star', min_rating) if min_rating > 0 else None
+        return AnyOf(StopAfter('div', 'results-sublist', days + 1),
+                     StopAfter('div', 'result-con', max + 2, outside='big-results', having=having))
+
+    @staticmethod
+    def results_only():
+        return Only(('div', 'big-results'), ('div', 'results-sublist'))
+
     def get_results(self, r: BeautifulSoup, days: int = 1,
                     min_rating: int = 1,
                     max: int = 30,
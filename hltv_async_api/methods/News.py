@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta
 import pytz
 from hltv_async_api.Utils.datetools import localize_datetime_to_timezone
+from hltv_async_api.types.Strainer import Only
 
 
 class News:
     def __init__(self, TIMEZONE):
         self.TIMEZONE = TIMEZONE
 
+    @staticmethod
+    def last_news_only():
+        return Only(('div', 'standard-list'))
+
     def get_last_news(self, r, max_reg_news=2, only_today=True, only_featured=False):
         today = datetime.now(tz=pytz.timezone(self.TIMEZONE))
         article_days = {
@@ -1,45 +1,35 @@
+from hltv_async_api.types.Strainer import Only
+from hltv_async_api.types.Schema import Schema, Field, Selector
+
+
+# only the first table, like find('tbody')
+TABLE = Selector('tbody')
+
+TOP_PLAYERS = Schema('tr', {
+    'id': Field('td.playerCol a', attr='href', transform=lambda href: href.split('/')[3]),
+    'nickname': Field('td.playerCol a'),
+    'team': Field('td.teamCol', attr='data-sort'),
+    'maps': Field('td.statsDetail'),
+    'rating': Field('td.ratingCol', optional=True, default='ERROR'),
+})
+
+
 class Players:
     def __init__(self, tz):
         self.TZ = tz
 
+    @staticmethod
+    def top_players_only():
+        return Only('tbody')
+
     @staticmethod
     def get_top_players(r, top):
-        players = []
-        rank = 1
         try:
-            for player in r.find('tbody').find_all('tr'):
-                name_div = player.find('td', {'class', 'playerCol'}).find('a')
-                id_ = name_div['href'].split('/')[3]
-                name = name_div.text
-                team = player.find('td', {'class', 'teamCol'})['data-sort']
-
-                maps = player.find('td', {'class', 'statsDetail'}).text
-
-                ratings = {'ratingCol ratingPositive', 'ratingCol ratingNeutral', 'ratingCol ratingNegative'}
-                rating = 'ERROR'
-                for rat in ratings:
-                    try:
-                        rating = player.find('td', {'class', rat}).text
-
-                        break
-                    except AttributeError:
-                        pass
-
-                players.append({
-                    'id': id_,
-                    'rank': rank,
-                    'nickname': name,
-                    'team': team,
-                    'maps': maps,
-                    'rating': rating,
-                })
-                rank += 1
-                if rank > top:
-                    break
-        except AttributeError:
+            players = TOP_PLAYERS.extract(TABLE.select(r, 1)[0], top)
+        except (AttributeError, IndexError):
             raise AttributeError("Top players parsing error, probably page not fully loaded")
 
-        return players
+        return [{'id': player['id'], 'rank': rank, **player} for rank, player in enumerate(players, start=1)]
 
     @staticmethod
     def get_player_info(r, id, nickname):
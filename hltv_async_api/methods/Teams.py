@@ -1,4 +1,17 @@
-from typing import Any
+from hltv_async_api.types.Stream import StopAfter
+from hltv_async_api.types.Strainer import Only
+from hltv_async_api.types.Schema import Schema, Field
+
+
+TOP_TEAMS = Schema('div.ranked-team.standard-box', {
+    'id': Field('a.details.moreLink', attr='href', transform=lambda href: href.split('/')[-1]),
+    'rank': Field('span.position', transform=lambda position: position[1:]),
+    # first team line is expanded, class tokens match both
+    'title': Field('div.teamLine.sectionTeamPlayers span.name'),
+    'points': Field('div.teamLine.sectionTeamPlayers span.points',
+                    transform=lambda points: points.split(' ', 1)[0][1:]),
+    'change': Field('div.change', optional=True, default=''),
+})
 
 
 class Teams:
@@ -6,46 +19,20 @@ class Teams:
         self.TZ = tz
 
     @staticmethod
-    def get_top_teams(r, max_teams):
-        teams = []
-        try:
-            for i, team in enumerate(r.find_all("div", {'class': "ranked-team standard-box"}), start=1):
-                if i > max_teams:
-                    break
-
-                rank = team.find('span', {'class': 'position'}).text[1:]
-                title_div: Any
-                if rank != '1':
-                    title_div = team.find('div', {'class': 'teamLine sectionTeamPlayers'})
-                else:
-                    title_div = team.find('div', {'class': 'teamLine sectionTeamPlayers teamLineExpanded'})
-
-                title = title_div.find('span', {'class': 'name'}).text
-                points = title_div.find('span', {'class': 'points'}).text.split(' ', 1)[0][1:]
+    def top_teams_until(max_teams):
+        return StopAfter('div', 'ranked-team', max_teams)
 
-                id_ = team.find('a', {'class': 'details moreLink'})['href'].split('/')[-1]
-
-                changes = {'change positive', 'change neutral', 'change negative'}
-                change = ''
-                for change_ in changes:
-                    try:
-                        change = team.find('div', {'class', change_}).text
-                        break
-                    except AttributeError:
-                        pass
+    @staticmethod
+    def top_teams_only():
+        return Only(('div', 'ranked-team'))
 
-                teams.append({
-                    'id': id_,
-                    'rank': rank,
-                    'title': title,
-                    'points': points,
-                    'change': change,
-                })
+    @staticmethod
+    def get_top_teams(r, max_teams):
+        try:
+            return TOP_TEAMS.extract(r, max_teams)
         except AttributeError:
             raise AttributeError("Parsing error, probably page not fully loaded")
 
-        return teams
-
     @staticmethod
     def get_team_info(r, team_id, title):
         team = {'id': int(team_id), 'title': title, 'rank': 0, 'players': {}, 'coach': '?', 'age': 0, 'weekstop30': 0}
@@ -0,0 +1,208 @@
+from bs4 import BeautifulSoup
+from lxml import etree
+
+
+def _literal(value: str) -> str:
+    """xpath string literal"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat('" + value.replace("'", "', \"'\", '") + "')"
+
+
+def _class_predicate(value: str) -> str:
+    # bs4: single class matches any of element classes, several match the whole attribute
+    if ' ' in value.strip():
+        return f"normalize-space(@class)={_literal(' '.join(value.split()))}"
+    return f"contains(concat(' ', normalize-space(@class), ' '), {_literal(' ' + value + ' ')})"
+
+
+def _predicate(attr: str, value) -> str:
+    if value is True:
+        return f'@{attr}'
+    if value is False or value is None:
+        return f'not(@{attr})'
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return '(' + ' or '.join(_predicate(attr, v) for v in value) + ')'
+    if attr == 'class':
+        return _class_predicate(str(value))
+    return f'@{attr}={_literal(str(value))}'
+
+
+def _freeze(value):
+    return frozenset(value) if isinstance(value, (list, tuple, set, frozenset)) else value
+
+
+# text of the subtree without script / style content, like bs4 get_text()
+_TEXT = etree.XPath('descendant-or-self::text()[not(parent::script or parent::style)]')
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+_PRESERVE = {'pre', 'textarea'}
+
+
+def _string(text) -> str:
+    # bs4 collapses whitespace only strings outside <pre> / <textarea> to a single '\n' or ' '
+    if text.strip(_ASCII_SPACES):
+        return str(text)
+    element = text.getparent()
+    if text.is_tail:
+        element = element.getparent()
+    while element is not None:
+        if element.tag in _PRESERVE:
+            return str(text)
+        element = element.getparent()
+    return '\n' if '\n' in text else ' '
+
+
+class LxmlNode:
+    """
+    lxml element behind the subset of bs4 Tag api used by methods extractors:
+    find, find_all, text, get_text, [attr], get
+    """
+
+    __slots__ = ('element',)
+
+    # (name, attrs, first, axis) -> compiled XPath, shared by all pages
+    _queries = {}
+
+    def __init__(self, element):
+        self.element = element
+
+    @classmethod
+    def _query(cls, name, attrs, first: bool, axis: str = 'descendant'):
+        key = (name, tuple(sorted((k, _freeze(v)) for k, v in attrs.items())), first, axis)
+        query = cls._queries.get(key)
+        if query is None:
+            predicates = ''.join(f'[{_predicate(attr, value)}]' for attr, value in attrs.items())
+            path = f"{axis}::{name or '*'}{predicates}"
+            query = cls._queries[key] = etree.XPath(f'({path})[1]' if first else path)
+        return query
+
+    @staticmethod
+    def _attrs(attrs, kwargs) -> dict:
+        if attrs is None:
+            attrs = {}
+        elif not isinstance(attrs, dict):
+            # bs4 treats non dict attrs as class filter
+            attrs = {'class': attrs}
+        else:
+            attrs = dict(attrs)
+        if 'class_' in kwargs:
+            attrs['class'] = kwargs.pop('class_')
+        attrs.update(kwargs)
+        return attrs
+
+    def _axis(self, recursive: bool) -> str:
+        # xpath on a document starts at its root element, which is a descendant for bs4
+        if self._is_document:
+            return 'descendant-or-self' if recursive else 'self'
+        return 'descendant' if recursive else 'child'
+
+    def find(self, name=None, attrs=None, recursive=True, **kwargs):
+        found = self._query(name, self._attrs(attrs, kwargs), True, self._axis(recursive))(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    def find_all(self, name=None, attrs=None, recursive=True, limit=None, **kwargs):
+        found = self._query(name, self._attrs(attrs, kwargs), False, self._axis(recursive))(self.element)
+        return [LxmlNode(element) for element in (found[:limit] if limit else found)]
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        if not self._is_document and self.element.tag in ('script', 'style'):
+            strings = [self.element.text or '']
+        else:
+            strings = [_string(text) for text in _TEXT(self.element)]
+        if strip:
+            strings = [s.strip() for s in strings if s.strip()]
+        return separator.join(strings)
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    @property
+    def _is_document(self) -> bool:
+        return isinstance(self.element, etree._ElementTree)
+
+    @property
+    def name(self) -> str:
+        return '[document]' if self._is_document else self.element.tag
+
+    @property
+    def attrs(self) -> dict:
+        if self._is_document:
+            return {}
+        attrs = dict(self.element.attrib)
+        if 'class' in attrs:
+            attrs['class'] = attrs['class'].split()
+        return attrs
+
+    def get(self, key, default=None):
+        value = None if self._is_document else self.element.get(key)
+        if value is None:
+            return default
+        # class is multi valued in bs4
+        return value.split() if key == 'class' else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        if self._is_document:
+            return etree.tostring(self.element, encoding=str)
+        return etree.tostring(self.element, encoding=str, with_tail=False)
+
+
+class RawPage:
+    """downloaded body in process mode, parsed by a worker together with the extractor"""
+
+    __slots__ = ('body', 'only')
+
+    def __init__(self, body: bytes, only=None):
+        self.body = body
+        self.only = only
+
+    def parse(self, backend):
+        if self.only is not None:
+            return backend(self.body, self.only)
+        return backend(self.body)
+
+
+def parse_bs4(body: bytes, only=None):
+    """only - Only filter, builds just the listed subtrees"""
+    return BeautifulSoup(body, 'lxml', parse_only=only.strainer() if only is not None else None)
+
+
+def parse_lxml(body: bytes) -> LxmlNode:
+    # decode ourselves, libxml2 falls back to latin-1 without a charset declaration
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        text = body.decode('cp1252', errors='replace')
+    # document node on top, like BeautifulSoup object, so <html> itself can be found
+    return LxmlNode(etree.ElementTree(etree.fromstring(text, etree.HTMLParser())))
+
+
+BACKENDS = {
+    'bs4': parse_bs4,
+    'lxml': parse_lxml,
+}
+
+
+def get_backend(backend) -> callable:
+    """name of a backend or callable bytes -> page"""
+    if callable(backend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend}, use {" | ".join(BACKENDS)} or callable')
+    return BACKENDS[backend]
+
+
+def supports_only(backend) -> bool:
+    # lxml builds the whole tree in C and wraps nodes lazily, filtering would not save anything
+    return backend is parse_bs4
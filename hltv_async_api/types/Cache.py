@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+
+# path pattern -> seconds. First match wins, user rules are checked before these.
+DEFAULT_TTL = {
+    r'^/ranking/': 6 * 3600,
+    r'^/stats/': 3600,
+    r'^/(team|player)/': 3600,
+    r'^/events/\d+': 600,
+    r'^/events': 600,
+    r'^/matches/\d+': 30,
+    r'^/matches': 15,
+    r'^/results': 60,
+}
+
+# age in seconds of the last page handed to the current task, 0 - just downloaded
+page_age: ContextVar[float | None] = ContextVar('hltv_page_age', default=None)
+
+
+class CacheEntry:
+    def __init__(self, body: bytes, page=None, stored: float | None = None, ttl: float = 0,
+                 etag: str | None = None, last_modified: str | None = None):
+        self.body = body
+        self.page = page
+        # Only.key -> page parsed with that filter
+        self.pages = {}
+        self.stored = time.time() if stored is None else stored
+        self.ttl = ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored
+
+    @property
+    def fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def staleness(self) -> float:
+        """seconds past ttl"""
+        return self.age - self.ttl
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class Cache:
+    def __init__(self,
+                 max_size: int = 256,
+                 path: str | None = None,
+                 ttl: dict | None = None,
+                 default_ttl: float = 60,
+                 logger=None,
+                 ):
+        self.logger = logger
+        self.MAX_SIZE = max_size
+        self.PATH = path
+        self.DEFAULT_TTL = default_ttl
+        self.TTL = [(re.compile(pattern), seconds)
+                    for pattern, seconds in list((ttl or {}).items()) + list(DEFAULT_TTL.items())]
+
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'stores': 0, 'evictions': 0, 'revalidated': 0}
+
+        if self.PATH:
+            os.makedirs(self.PATH, exist_ok=True)
+
+    @staticmethod
+    def _path_of(url: str) -> str:
+        parts = urlsplit(url)
+        return parts.path + ('?' + parts.query if parts.query else '')
+
+    def ttl_for(self, url: str) -> float:
+        path = self._path_of(url)
+        for pattern, seconds in self.TTL:
+            if pattern.match(path):
+                return seconds
+        return self.DEFAULT_TTL
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def get(self, url: str) -> CacheEntry | None:
+        """returns fresh in-memory entry or None, counts hit/miss"""
+        entry = self.entries.get(url)
+        if entry is not None and entry.fresh:
+            self.entries.move_to_end(url)
+            self.stats['hits'] += 1
+            return entry
+        self.stats['misses'] += 1
+        return None
+
+    def peek(self, url: str) -> CacheEntry | None:
+        """returns in-memory entry even if expired, no counters"""
+        return self.entries.get(url)
+
+    def set(self, url: str, body: bytes, page=None, headers=None, only=None) -> CacheEntry:
+        """only - filter the page was parsed with, body is always the full one"""
+        headers = headers or {}
+        entry = CacheEntry(body, page if only is None else None, ttl=self.ttl_for(url),
+                           etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'))
+        if only is not None and page is not None:
+            entry.pages[only.key] = page
+        self._put(url, entry)
+        self.stats['stores'] += 1
+        return entry
+
+    def refresh(self, url: str, entry: CacheEntry, headers=None) -> CacheEntry:
+        """304 Not Modified, keep body and restart ttl"""
+        headers = headers or {}
+        entry.stored = time.time()
+        entry.ttl = self.ttl_for(url)
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified', entry.last_modified)
+        self._put(url, entry)
+        self.stats['revalidated'] += 1
+        return entry
+
+    def _put(self, url: str, entry: CacheEntry):
+        self.entries[url] = entry
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.MAX_SIZE:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def discard(self, url: str):
+        self.entries.pop(url, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    # disk tier, blocking io -> call it through Executor
+
+    def _file_of(self, url: str) -> str:
+        return os.path.join(self.PATH, hashlib.sha1(url.encode()).hexdigest())
+
+    def promote(self, url: str, entry: CacheEntry) -> CacheEntry | None:
+        """puts entry read by load() into memory, returns it only if fresh. Call it from the event loop"""
+        current = self.entries.get(url)
+        if current is not None and current.stored >= entry.stored:
+            # stored in memory while the file was being read
+            entry = current
+        else:
+            self._put(url, entry)
+        if not entry.fresh:
+            return None
+
+        self.stats['disk_hits'] += 1
+        self.stats['misses'] -= 1
+        self.stats['hits'] += 1
+        return entry
+
+    def load(self, url: str) -> CacheEntry | None:
+        """reads entry from disk tier, fresh or not, memory tier is left to promote()"""
+        if not self.PATH:
+            return None
+        file = self._file_of(url)
+        try:
+            with open(file + '.json', 'r') as f:
+                meta = json.load(f)
+            with open(file + '.html', 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        return CacheEntry(body, stored=meta['stored'], ttl=self.ttl_for(url),
+                          etag=meta.get('etag'), last_modified=meta.get('last_modified'))
+
+    def dump(self, url: str, entry: CacheEntry):
+        if not self.PATH:
+            return
+        file = self._file_of(url)
+        try:
+            with open(file + '.html', 'wb') as f:
+                f.write(entry.body)
+            with open(file + '.json', 'w') as f:
+                json.dump({'url': url, 'stored': entry.stored,
+                           'etag': entry.etag, 'last_modified': entry.last_modified}, f)
+        except OSError as e:
+            if self.logger:
+                self.logger.debug(f'Cache write failed {e}')
+
+
+class NegativeCache:
+    """Remembers urls that failed permanently (404, page of unexpected shape) for `ttl` seconds"""
+
+    def __init__(self, ttl: float = 60, max_size: int = 1024):
+        self.TTL = ttl
+        self.MAX_SIZE = max_size
+        # url -> (expires, failure)
+        self.entries = OrderedDict()
+
+    def get(self, url: str):
+        """returns remembered Failure or None"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        expires, failure = entry
+        if time.monotonic() >= expires:
+            del self.entries[url]
+            return None
+        return failure
+
+    def set(self, url: str, failure):
+        self.entries[url] = (time.monotonic() + self.TTL, failure)
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.MAX_SIZE:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
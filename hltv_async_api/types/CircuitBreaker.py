@@ -0,0 +1,83 @@
+import time
+from urllib.parse import urlsplit
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def family(url: str) -> str:
+    """endpoint family, first path segment: /matches/2370000/a-vs-b -> /matches"""
+    return '/' + urlsplit(url).path.strip('/').split('/', 1)[0]
+
+
+class Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def __repr__(self):
+        return f'Circuit({self.state}, failures={self.failures}, trips={self.trips})'
+
+
+class CircuitBreaker:
+    """
+    Circuit per endpoint family (/matches, /stats, /team...).
+    `threshold` failed fetches in a row open it, while open fetches fail fast,
+    after `reset` seconds one probe is let through (half-open): success closes, failure reopens
+    """
+
+    def __init__(self, threshold: int = 5, reset: float = 30.0, logger=None):
+        self.THRESHOLD = threshold
+        self.RESET = reset
+        self.logger = logger
+        self.circuits = {}
+
+    def _circuit(self, url: str) -> Circuit:
+        key = family(url)
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            circuit = self.circuits[key] = Circuit()
+        return circuit
+
+    def allow(self, url: str) -> bool:
+        circuit = self._circuit(url)
+        if circuit.state == CLOSED:
+            return True
+        if circuit.state == OPEN and time.monotonic() - circuit.opened >= self.RESET:
+            circuit.state = HALF_OPEN
+        if circuit.state == HALF_OPEN and not circuit.probing:
+            circuit.probing = True
+            return True
+        return False
+
+    def report(self, url: str, ok: bool):
+        circuit = self._circuit(url)
+        circuit.probing = False
+        if ok:
+            if circuit.state != CLOSED and self.logger:
+                self.logger.info(f'Circuit {family(url)} closed')
+            circuit.state = CLOSED
+            circuit.failures = 0
+            return
+
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or circuit.failures >= self.THRESHOLD:
+            if circuit.state != OPEN and self.logger:
+                self.logger.warning(f'Circuit {family(url)} opened for {self.RESET}s')
+            circuit.state = OPEN
+            circuit.opened = time.monotonic()
+            circuit.trips += 1
+
+    def abort(self, url: str):
+        """probe was cancelled, next fetch probes again"""
+        circuit = self._circuit(url)
+        if circuit.probing:
+            circuit.probing = False
+
+    def stats(self) -> dict:
+        return dict(self.circuits)
@@ -0,0 +1,65 @@
+import re
+from urllib.parse import urlsplit
+
+OK = 'ok'
+CHALLENGE = 'challenge'
+EMPTY = 'empty'
+TRUNCATED = 'truncated'
+UNEXPECTED = 'unexpected'
+
+CHALLENGE_MARKERS = (
+    b'challenge-error-title',
+    b'cf-chl-',
+    b'<title>Just a moment...</title>',
+)
+
+# path pattern -> bytes every intact page of this type contains (what extractors can't live without)
+PAGE_MARKERS = {
+    r'^/ranking/teams': b'ranked-team',
+    r'^/stats/players': b'<tbody',
+    r'^/player/\d+': b'playerRealname',
+    r'^/team/\d+': b'bodyshot-team',
+    r'^/matches/\d+': b'countdown',
+    # event info only, /events/<id>/matches and /results pages have no eventdate
+    r'^/events/\d+/(?!matches$|results$)[^/]+$': b'eventdate',
+}
+
+
+class Classifier:
+    """
+    Cheap checks on raw bytes before the page is parsed,
+    bad responses are rejected without paying for BeautifulSoup
+    """
+
+    def __init__(self, markers: dict | None = None, min_length: int = 256):
+        self.MIN_LENGTH = min_length
+        self.MARKERS = [(re.compile(pattern), marker)
+                        for pattern, marker in list((markers or {}).items()) + list(PAGE_MARKERS.items())]
+
+    def marker_for(self, url: str) -> bytes | None:
+        path = urlsplit(url).path
+        for pattern, marker in self.MARKERS:
+            if pattern.match(path):
+                return marker
+        return None
+
+    @staticmethod
+    def is_challenge(body: bytes) -> bool:
+        # challenge pages are small, markers sit in the head
+        return any(marker in body[:16 * 1024] for marker in CHALLENGE_MARKERS)
+
+    def classify(self, url: str, body: bytes, truncated: bool = False) -> str:
+        """
+        :params:
+        truncated - body was cut on purpose (streaming mode), skip the end of document check
+        """
+        if self.is_challenge(body):
+            return CHALLENGE
+        if len(body.strip()) < self.MIN_LENGTH:
+            return EMPTY
+        if not truncated and b'</html>' not in body[-2048:].lower():
+            return TRUNCATED
+        marker = self.marker_for(url)
+        if marker is not None and marker not in body:
+            return UNEXPECTED
+        return OK
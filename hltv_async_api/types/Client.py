@@ -1,9 +1,25 @@
+import asyncio
+import os
 import random
+import time
+from contextlib import asynccontextmanager
 from typing import Optional, Union
 from fake_useragent import UserAgent
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector, DummyCookieJar
 import logging
 
+from .Cache import Cache, NegativeCache
+from .CircuitBreaker import CircuitBreaker
+from .RateLimiter import RateLimiter
+from .ProxyPool import ProxyPool
+from .RetryPolicy import RetryPolicy
+from .Classifier import Classifier
+from .Transport import Transport, AiohttpTransport, HttpxTransport
+from .Identity import Identity, IdentityStore, make_headers
+from .Concurrency import AIMDLimit, AdaptiveLimiter
+from .Scheduler import Scheduler
+from .Backend import get_backend
+
 
 class Client:
     def __init__(self,
@@ -18,6 +34,45 @@ class Client:
                  remove_proxy: bool = False,
                  user_agent: str = None,
                  logger=logging.getLogger(),
+                 cache: bool = False,
+                 cache_size: int = 256,
+                 cache_path: str | None = None,
+                 cache_ttl: dict | None = None,
+                 rate_limit: float | None = None,
+                 rate_burst: int = 1,
+                 rate_limits: dict | None = None,
+                 rate_fair: bool = True,
+                 proxy_max_failures: int = 3,
+                 proxy_cooldown: float = 30.0,
+                 connection_limit: int = 100,
+                 connection_limit_per_host: int = 0,
+                 keepalive_timeout: float = 15.0,
+                 dns_cache_ttl: int | None = 10,
+                 preconnect: int = 0,
+                 hedge: bool = False,
+                 hedge_percentile: float = 0.95,
+                 hedge_delay: float = 1.0,
+                 stream: bool = False,
+                 retry_policy: RetryPolicy | None = None,
+                 backoff: bool = False,
+                 retry_budget: float | None = None,
+                 page_markers: dict | None = None,
+                 transport: str | Transport = 'aiohttp',
+                 proxy_slots: int = 0,
+                 proxy_preflight: bool = False,
+                 proxy_watch: float | None = None,
+                 stale_while_revalidate: bool = False,
+                 max_stale: float = 0,
+                 negative_ttl: float = 0,
+                 circuit_threshold: int = 0,
+                 circuit_reset: float = 30.0,
+                 identity_path: str | None = None,
+                 adaptive: bool = False,
+                 adaptive_initial: int = 4,
+                 adaptive_max: int = 64,
+                 scheduler_slots: int = 0,
+                 scheduler_reserve: int | None = None,
+                 backend: str = 'bs4',
                  ):
         if min_delay is None:
             min_delay = -1.0
@@ -34,32 +89,15 @@ class Client:
         self.MAX_DELAY = float(max_delay)
 
         self.UA = UserAgent()
+        # fixed user agent is shared by every identity, otherwise each proxy gets its own
+        self.identities = IdentityStore(user_agent or (lambda: self.UA.random), identity_path, logger)
         if user_agent is None:
             user_agent = self.UA.random
-        self.user_agent = user_agent
-
-        rand_v = f"127.0.{round(random.random() * 10000)}.{round(random.random() * 100)}"
-
-        self.headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
-            "Accept-Language": "en;q=0.9,en-US;q=0.8",
-            "Cache-Control": "max-age=0",
-            "Cookie": "nightmode=on; promode=on; hltvTimeZone=Europe/Copenhagen;",
-            "Priority": "u=0, i",
-            "Referer": "https://www.hltv.org/",
-            "sec-ch-ua": f'"Microsoft Edge";v="127", "Chromium";v="{rand_v}"',
-            "sec-ch-ua-arch": "x86",
-            "sec-ch-ua-bitness": "64",
-            "sec-ch-ua-full-version": f"{rand_v}",
-            "sec-ch-ua-full-version-list": f'"Not)A;Brand";v="99.0.0.0", "Microsoft Edge";v="{rand_v}", "Chromium";v="{rand_v}"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-model": "",
-            "sec-ch-ua-platform": "Windows",
-            "sec-ch-ua-platform-version": "15.0.0",
-            "Upgrade-Insecure-Requests": "1",
-            "User-Agent": self.user_agent,
-        }
+        if '' not in self.identities.identities:
+            self.identities.set('', Identity(make_headers(user_agent)))
+        # headers of the direct connection identity
+        self.headers = self.identities.get('').headers
+        self.user_agent = self.headers['User-Agent']
 
         # user-agent switcher
 
@@ -68,18 +106,101 @@ class Client:
         self.PROXY_PROTOCOL = proxy_protocol
         self.PROXY_ONCE = remove_proxy
         self.PROXY_DELAY = proxy_delay
+        self.PROXY_MAX_FAILURES = proxy_max_failures
+        self.PROXY_COOLDOWN = proxy_cooldown
+        self.PROXY_SLOTS = proxy_slots
+        self.PROXY_PREFLIGHT = proxy_preflight
+        self.PROXY_WATCH = proxy_watch
+        self.watcher = None
+        # duplicate slow requests on another proxy
+        self.HEDGE = hedge
+        self.HEDGE_PERCENTILE = hedge_percentile
+        self.HEDGE_DELAY = hedge_delay
+        # incremental parsing, stop download when extractor has enough
+        self.STREAM = stream
+        # concurrency limits, global and per proxy, follow block rate (AIMD)
+        self.ADAPTIVE = adaptive
+        self.ADAPTIVE_INITIAL = adaptive_initial
+        self.ADAPTIVE_MAX = adaptive_max
+        self.concurrency = AdaptiveLimiter(AIMDLimit(adaptive_initial, max_limit=adaptive_max)) if adaptive else None
+        # priority lanes, high priority requests start first, low ones use spare slots only
+        self.scheduler = Scheduler(scheduler_slots, scheduler_reserve) if scheduler_slots else None
+        self.pool = None
         self.init_proxy()
 
+        self.cache = None
+        if cache or cache_path:
+            self.cache = Cache(cache_size, cache_path, cache_ttl, logger=self.logger)
+        # expired pages up to MAX_STALE seconds are served on upstream failure or right away (swr)
+        self.STALE_WHILE_REVALIDATE = stale_while_revalidate
+        self.MAX_STALE = max_stale
+        # permanent failures (404, unexpected page) are not retried for negative_ttl seconds
+        self.negative = NegativeCache(negative_ttl) if negative_ttl else None
+        # fail fast on endpoint family that keeps failing
+        self.breaker = CircuitBreaker(circuit_threshold, circuit_reset, self.logger) if circuit_threshold else None
+
         self._init_delay()
+        # token bucket replaces sleep-based delays when set
+        self.limiter = None
+        if rate_limit:
+            self.limiter = RateLimiter(rate_limit, rate_burst, rate_limits, rate_fair)
+
         self.timeout = timeout
         self.max_retries = max_retries
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_retries, backoff=backoff, budget=retry_budget)
+        self.retry_policy = retry_policy
+        self.classifier = Classifier(page_markers)
+        # html -> page for methods extractors, bs4 or lxml (faster, bs4-like api)
+        self.backend = get_backend(backend)
+
+        # aiohttp pools connections per (host, proxy), so per host limit is per proxy as well
+        self.CONNECTION_LIMIT = connection_limit
+        self.CONNECTION_LIMIT_PER_HOST = connection_limit_per_host
+        self.KEEPALIVE_TIMEOUT = keepalive_timeout
+        self.DNS_CACHE_TTL = dns_cache_ttl
+        self.PRECONNECT = preconnect
         self.session = None
         self._create_session()
+        self.transport = self._init_transport(transport)
+
+    def _init_transport(self, transport):
+        if isinstance(transport, Transport):
+            return transport
+        if transport == 'aiohttp':
+            return AiohttpTransport(self)
+        if transport in ('httpx', 'http2'):
+            return HttpxTransport(http2=transport == 'http2',
+                                  max_connections=self.CONNECTION_LIMIT or 100,
+                                  keepalive_expiry=self.KEEPALIVE_TIMEOUT)
+        raise ValueError(f'Unknown transport {transport}, use aiohttp | httpx | http2 or Transport instance')
 
     def _create_session(self):
         if not self.session:
             self.logger.debug('Creating Session')
-            self.session = ClientSession()
+            connector = TCPConnector(limit=self.CONNECTION_LIMIT,
+                                     limit_per_host=self.CONNECTION_LIMIT_PER_HOST,
+                                     keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+                                     use_dns_cache=self.DNS_CACHE_TTL is not None,
+                                     ttl_dns_cache=self.DNS_CACHE_TTL)
+            # cookies are per identity, shared session jar would leak them between proxies
+            self.session = ClientSession(connector=connector, cookie_jar=DummyCookieJar())
+
+    async def preconnect(self, connections: int | None = None, url: str = 'https://www.hltv.org/'):
+        """opens keep-alive connections (TLS handshake included) through every proxy ahead of the first request"""
+        connections = connections or self.PRECONNECT or 1
+        proxies = self.pool.urls if self.pool else ['']
+
+        async def _open(proxy):
+            try:
+                async with self.transport.request('HEAD', url, headers=self.identities.headers(proxy), proxy=proxy,
+                                                  timeout=self.timeout):
+                    pass
+            except Exception as e:
+                self.logger.debug(f"Preconnect {proxy if proxy else 'No Proxy'} failed: {e}")
+
+        self.logger.debug(f'Preconnecting {connections} connection(s) to {len(proxies)} route(s)')
+        await asyncio.gather(*[_open(proxy) for proxy in proxies for _ in range(connections)])
 
     def get_session(self):
         if not self.session:
@@ -96,41 +217,172 @@ class Client:
             self.logger.warning(f'Invalid min/max delay. Delay will be increasing by 1 sec')
         self.MIN_DELAY = None
 
+    def _load_proxies(self) -> list:
+        proxies = self.PROXY_LIST
+        if self.PROXY_PATH:
+            with open(self.PROXY_PATH, "r") as file:
+                proxies = [line.strip() for line in file.readlines()]
+        if self.PROXY_PROTOCOL:
+            proxies = [self.PROXY_PROTOCOL + '://' + proxy if proxy and '://' not in proxy else proxy
+                       for proxy in proxies]
+        return proxies
+
     def init_proxy(self):
         self.USE_PROXY = self.PROXY_PATH or self.PROXY_LIST
         if self.USE_PROXY:
-            if self.PROXY_PATH:
-                with open(self.PROXY_PATH, "r") as file:
-                    self.PROXY_LIST = [line.strip() for line in file.readlines()]
-            if self.PROXY_PROTOCOL:
-                self.PROXY_LIST = [self.PROXY_PROTOCOL + '://' + proxy for proxy in self.PROXY_LIST]
+            self.PROXY_LIST = self._load_proxies()
+            self.pool = ProxyPool(self.PROXY_LIST,
+                                  remove=self.PROXY_ONCE,
+                                  max_failures=self.PROXY_MAX_FAILURES,
+                                  cooldown=self.PROXY_COOLDOWN,
+                                  slots=self.PROXY_SLOTS,
+                                  limit=self._proxy_limit if self.ADAPTIVE else None,
+                                  logger=self.logger)
+
+    async def preflight(self, proxies: list | None = None, url: str = 'https://www.hltv.org/', concurrency: int = 50):
+        """
+        Probes proxies concurrently: reachability, latency and cloudflare challenge.
+        Dead and challenged proxies are ejected, probe latency of the rest feeds their scores
+        """
+        if self.pool is None:
+            return
+        proxies = self.pool.urls if proxies is None else proxies
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _probe(proxy):
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    async with self.transport.request('GET', url, headers=self.identities.headers(proxy), proxy=proxy,
+                                                      timeout=self.timeout) as response:
+                        # the head is enough to spot a challenge
+                        head = b''
+                        async for chunk in response.iter_chunks(16 * 1024):
+                            head += chunk
+                            if len(head) >= 16 * 1024:
+                                break
+                        challenge = self.classifier.is_challenge(head)
+                        ok = response.status == 200 and not challenge
+                        self.pool.report(proxy, ok, time.monotonic() - start, challenge)
+                        if not ok:
+                            self.pool.eject(proxy)
+                        return ok
+                except Exception as e:
+                    self.logger.debug(f"Preflight {proxy if proxy else 'No Proxy'} failed: {e}")
+                    self.pool.eject(proxy)
+                    return False
 
-    def get_proxy(self):
+        # probe latencies and ejections already steer get() / try_acquire() through the scores
+        results = await asyncio.gather(*[_probe(proxy) for proxy in proxies])
+        self.logger.info(f'Preflight: {sum(results)}/{len(results)} proxies alive')
+
+    async def _watch_proxies(self):
+        mtime = os.path.getmtime(self.PROXY_PATH)
+        while True:
+            await asyncio.sleep(self.PROXY_WATCH)
+            try:
+                current = os.path.getmtime(self.PROXY_PATH)
+                if current == mtime:
+                    continue
+                mtime = current
+                proxies = self._load_proxies()
+            except OSError as e:
+                self.logger.error(f'Proxy file reload failed: {e}')
+                continue
+
+            new = [proxy for proxy in proxies if proxy not in self.pool.proxies]
+            self.pool.update(proxies)
+            self.PROXY_LIST = self.pool.urls
+            self.logger.info(f'Proxy file reloaded, {len(proxies)} proxies ({len(new)} new)')
+            if self.PROXY_PREFLIGHT and new:
+                await self.preflight(new)
+
+    def watch_proxies(self):
+        """reloads proxy_path on change without restart"""
+        if self.PROXY_PATH and self.pool is not None and self.watcher is None:
+            self.watcher = asyncio.ensure_future(self._watch_proxies())
+
+    def _proxy_limit(self) -> AIMDLimit:
+        return AIMDLimit(self.ADAPTIVE_INITIAL, max_limit=self.PROXY_SLOTS or self.ADAPTIVE_MAX)
+
+    @asynccontextmanager
+    async def concurrency_slot(self):
+        if self.scheduler is not None:
+            await self.scheduler.acquire()
         try:
-            proxy = self.PROXY_LIST[0]
+            if self.concurrency is None:
+                yield
+                return
+            async with self.concurrency.slot():
+                yield
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release()
+
+    def adapt(self, proxy, ok: bool):
+        """success or block signal (403, 429, challenge) for adaptive limits"""
+        if self.concurrency is None:
+            return
+        lowered = self.concurrency.limit.permits
+        self.concurrency.report(ok)
+        if not ok and self.concurrency.limit.permits < lowered:
+            self.logger.info(f'Blocked, concurrency limit lowered to {self.concurrency.limit.permits}')
+        if self.pool is not None and proxy is not None:
+            self.pool.adapt(proxy, ok)
 
-            if self.PROXY_PROTOCOL and proxy != '' and self.PROXY_PROTOCOL not in proxy:
-                proxy = self.PROXY_PROTOCOL + '://' + proxy
+    def limits(self) -> dict:
+        """current adaptive limits: {'global': int, 'proxies': {url: int}}"""
+        if self.concurrency is None:
+            return {}
+        proxies = {p.url: p.limit.permits for p in self.pool.proxies.values()} if self.pool else {}
+        return {'global': self.concurrency.limit.permits, 'proxies': proxies}
 
-            return proxy
-        except IndexError:
+    def get_proxy(self, exclude=()):
+        proxy = self.pool.get(exclude)
+        if proxy is None:
             self.logger.error('No proxies left')
+        return proxy
 
-    def switch_proxy(self):
+    @asynccontextmanager
+    async def lease_proxy(self, exclude=()):
+        """reserves the best free proxy for the lifetime of one request"""
+        proxy = await self.pool.acquire(exclude)
+        if proxy is None:
+            self.logger.error('No proxies left')
         try:
-            if self.PROXY_ONCE:
-                self.logger.debug(f'Removing proxy {self.PROXY_LIST[0]}')
-                self.PROXY_LIST = self.PROXY_LIST[1:]
-            else:
-                self.logger.debug(f"Switching proxy {self.PROXY_LIST[0] if self.PROXY_LIST[0] else 'No Proxy'}")
-                self.PROXY_LIST = self.PROXY_LIST[1:] + [(self.PROXY_LIST[0])]
-                self.logger.info(f"New proxy: {self.PROXY_LIST[0] if self.PROXY_LIST[0] else 'No Proxy'}")
-        except IndexError:
+            yield proxy
+        finally:
+            if proxy is not None:
+                await self.pool.release(proxy)
+
+    def report_proxy(self, proxy, ok: bool, latency: float | None = None, challenge: bool = False):
+        if self.pool is not None and proxy is not None:
+            self.pool.report(proxy, ok, latency, challenge)
+            self.PROXY_LIST = self.pool.urls
+
+    def switch_proxy(self, proxy=None, challenge: bool = False):
+        """marks proxy as failed, next get_proxy() routes to the best healthy one"""
+        if self.pool is None or not len(self.pool):
             self.logger.error('No proxies left')
+            return
+        if proxy is None:
+            proxy = self.get_proxy()
+        self.logger.debug(f"Switching proxy {proxy if proxy else 'No Proxy'}")
+        self.report_proxy(proxy, False, challenge=challenge)
 
-    def switch_user_agent(self):
-        if self.user_agent:
-            self.headers['user-agent'] = self.UA.random
+    def switch_user_agent(self, proxy=None):
+        """replaces identity (user agent, headers, cookies) of the proxy"""
+        identity = self.identities.rotate(proxy)
+        if not proxy:
+            self.headers = identity.headers
+            self.user_agent = identity.user_agent
 
     async def close_session(self):
-        await self.session.close()
\ No newline at end of file
+        if self.watcher is not None:
+            self.watcher.cancel()
+            self.watcher = None
+        if self.session:
+            await self.session.close()
+        await self.transport.close()
+        if self.identities.dirty:
+            self.identities.dump()
\ No newline at end of file
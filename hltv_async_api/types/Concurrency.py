@@ -0,0 +1,73 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class AIMDLimit:
+    """
+    Concurrency limit driven by block signals: +`increase` per window of `limit` successes,
+    x`decrease` on 403/429/challenge, at most one decrease per `cooldown` seconds (one congestion event)
+    """
+
+    def __init__(self, initial: float = 4, min_limit: float = 1, max_limit: float = 64,
+                 increase: float = 1.0, decrease: float = 0.5, cooldown: float = 1.0):
+        self.MIN = min_limit
+        self.MAX = max_limit
+        self.INCREASE = increase
+        self.DECREASE = decrease
+        self.COOLDOWN = cooldown
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.decreased = 0.0
+
+    @property
+    def permits(self) -> int:
+        return int(self.limit)
+
+    def on_success(self):
+        self.limit = min(self.MAX, self.limit + self.INCREASE / self.limit)
+
+    def on_block(self) -> bool:
+        """returns True if the limit was lowered"""
+        now = time.monotonic()
+        if now - self.decreased < self.COOLDOWN:
+            return False
+        self.decreased = now
+        self.limit = max(self.MIN, self.limit * self.DECREASE)
+        return True
+
+    def __repr__(self):
+        return f'AIMDLimit({round(self.limit, 2)})'
+
+
+class AdaptiveLimiter:
+    """Semaphore whose size follows AIMDLimit"""
+
+    def __init__(self, limit: AIMDLimit):
+        self.limit = limit
+        self.active = 0
+        self.released = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.released:
+            while self.active >= self.limit.permits:
+                await self.released.wait()
+            self.active += 1
+
+    async def release(self):
+        self.active -= 1
+        async with self.released:
+            self.released.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def report(self, ok: bool):
+        if ok:
+            self.limit.on_success()
+        else:
+            self.limit.on_block()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+
+# absolute time.monotonic() of the current call's deadline (or SharedDeadline), inherited by tasks it spawns
+_deadline: ContextVar = ContextVar('hltv_deadline', default=None)
+
+
+class HltvTimeoutError(asyncio.TimeoutError):
+    """Call budget (deadline) exhausted"""
+
+
+class SharedDeadline:
+    """
+    Deadline of a task awaited by several callers: the latest of theirs, None if one of them is unbounded.
+    Moves as callers join and leave
+    """
+
+    __slots__ = ('waiters',)
+
+    def __init__(self):
+        self.waiters = []
+
+    @property
+    def at(self) -> float | None:
+        deadlines = [_resolve(waiter) for waiter in self.waiters]
+        if not deadlines or None in deadlines:
+            return None
+        return max(deadlines)
+
+    def join(self):
+        """adds the deadline of the current context, returns the token for leave()"""
+        token = _deadline.get()
+        self.waiters.append(token)
+        return token
+
+    def leave(self, token):
+        self.waiters.remove(token)
+
+    async def run(self, coro):
+        """awaits coro under this deadline, call inside the shared task"""
+        _deadline.set(self)
+        return await coro
+
+
+def _resolve(deadline) -> float | None:
+    return deadline.at if isinstance(deadline, SharedDeadline) else deadline
+
+
+def current() -> float | None:
+    """absolute time.monotonic() deadline of the current call, None if unbounded"""
+    return _resolve(_deadline.get())
+
+
+def remaining() -> float | None:
+    """seconds left for the current call, None if unbounded"""
+    deadline = current()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def clamp(timeout: float | None) -> float | None:
+    """timeout cut to the remaining budget, raises if the budget is gone"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise HltvTimeoutError('Deadline exceeded')
+    return left if timeout is None else min(timeout, left)
+
+
+async def run(coro, seconds: float | None):
+    """awaits coro within `seconds`, nested budgets never extend the outer one"""
+    if seconds is None:
+        return await coro
+
+    deadline = time.monotonic() + seconds
+    outer = current()
+    if outer is not None:
+        deadline = min(deadline, outer)
+
+    token = _deadline.set(deadline)
+    try:
+        if hasattr(asyncio, 'timeout'):
+            # same task, so context changes made by the call stay visible to the caller
+            async with asyncio.timeout(max(deadline - time.monotonic(), 0)):
+                return await coro
+        # task created here copies the context with our deadline
+        return await asyncio.wait_for(coro, max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError as e:
+        if isinstance(e, HltvTimeoutError):
+            raise
+        raise HltvTimeoutError(f'Deadline of {seconds}s exceeded') from None
+    finally:
+        _deadline.reset(token)
+
+
+def detach():
+    """drops the deadline in the current context, for background work outliving its caller"""
+    _deadline.set(None)
+
+
+def with_deadline(func):
+    """
+    Adds `deadline` kwarg (seconds) to Hltv method, default is Hltv(deadline=...).
+    Raises HltvTimeoutError when the budget is exhausted
+    """
+    @wraps(func)
+    async def wrapper(self, *args, deadline: float | None = None, **kwargs):
+        if deadline is None:
+            deadline = self.DEADLINE
+        return await run(func(self, *args, **kwargs), deadline)
+    return wrapper
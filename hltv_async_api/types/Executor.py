@@ -1,11 +1,34 @@
+import multiprocessing
+import os
+from concurrent.futures.process import BrokenProcessPool
 from functools import partial
 
 
+def _extract(backend, raw, func, args, kwargs, keep: bool = False):
+    # one executor task for parse + extract, in process mode only the body and plain result
+    # data cross the process boundary
+    page = raw.parse(backend)
+    result = func(page, *args, **kwargs)
+    return (page, result) if keep else result
+
+
 class Executor:
-    def __init__(self, loop=None, executor=None, logger=None):
+    def __init__(self, loop=None, executor=None, logger=None,
+                 processes: int | bool = False, max_tasks_per_child: int = 500):
+        """
+        :params:
+        processes - worker processes for parse + extract, True - one per cpu core, 0 / False - threads only.
+        Workers start with forkserver (spawn where unavailable), guard the entry script with `if __name__ == '__main__'`
+        max_tasks_per_child - tasks per worker before the pool is replaced, 0 - never
+        """
         self.EXECUTOR = executor
         self.configure_executor()
         self.loop = loop
+        self.logger = logger
+        self.PROCESSES = (os.cpu_count() or 1) if processes is True else int(processes)
+        self.MAX_TASKS_PER_CHILD = max_tasks_per_child
+        self.process_pool = None
+        self.submitted = 0
 
     def configure_executor(self, max_workers: int = 10):
         if not self.EXECUTOR:
@@ -21,5 +44,47 @@ class Executor:
     async def run(self, func, *args, **kwargs):
         return await self.loop.run_in_executor(self.EXECUTOR, partial(func, *args, **kwargs))
 
+    @staticmethod
+    def _mp_context():
+        # fork copies the loop, locks and sockets of the parent into workers
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return multiprocessing.get_context(method)
+
+    def _process_pool(self):
+        # workers are recycled by replacing the whole pool: ProcessPoolExecutor(max_tasks_per_child)
+        # leaves queued tasks pending forever when a worker exits under concurrent submits (3.11 - 3.13).
+        # Old pool finishes its queued tasks
+        if self.process_pool is not None and self.MAX_TASKS_PER_CHILD and \
+                self.submitted >= self.MAX_TASKS_PER_CHILD * self.PROCESSES:
+            self.process_pool.shutdown(wait=False)
+            self.process_pool = None
+        if self.process_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self.process_pool = ProcessPoolExecutor(max_workers=self.PROCESSES, mp_context=self._mp_context())
+            self.submitted = 0
+        self.submitted += 1
+        return self.process_pool
+
+    async def extract(self, backend, func, raw, *args, **kwargs):
+        """parses RawPage with backend and runs extractor func on it, in a worker process if enabled"""
+        task = partial(_extract, backend, raw, func, args, kwargs)
+        if not self.PROCESSES:
+            return await self.loop.run_in_executor(self.EXECUTOR, task)
+        try:
+            return await self.loop.run_in_executor(self._process_pool(), task)
+        except BrokenProcessPool:
+            # a worker died (oom, crash), retry once on a fresh pool
+            if self.logger:
+                self.logger.warning('Process pool broken, restarting')
+            self.process_pool = None
+            return await self.loop.run_in_executor(self._process_pool(), task)
+
+    async def parse_extract(self, backend, func, raw, *args, **kwargs):
+        """like extract, always in the thread pool, returns (page, result) so the page can be cached"""
+        return await self.loop.run_in_executor(self.EXECUTOR, partial(_extract, backend, raw, func, args, kwargs, True))
+
     def close(self):
         self.EXECUTOR.shutdown()
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
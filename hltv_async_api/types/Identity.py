@@ -0,0 +1,148 @@
+import json
+import os
+import random
+import tempfile
+from http.cookies import SimpleCookie
+
+
+DEFAULT_COOKIES = {'nightmode': 'on', 'promode': 'on', 'hltvTimeZone': 'Europe/Copenhagen'}
+
+
+def make_headers(user_agent: str) -> dict:
+    """browser-like header profile, client hints are generated once per profile"""
+    rand_v = f"127.0.{round(random.random() * 10000)}.{round(random.random() * 100)}"
+    return {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+        "Accept-Encoding": "gzip, deflate, br, zstd",
+        "Accept-Language": "en;q=0.9,en-US;q=0.8",
+        "Cache-Control": "max-age=0",
+        "Priority": "u=0, i",
+        "Referer": "https://www.hltv.org/",
+        "sec-ch-ua": f'"Microsoft Edge";v="127", "Chromium";v="{rand_v}"',
+        "sec-ch-ua-arch": "x86",
+        "sec-ch-ua-bitness": "64",
+        "sec-ch-ua-full-version": f"{rand_v}",
+        "sec-ch-ua-full-version-list": f'"Not)A;Brand";v="99.0.0.0", "Microsoft Edge";v="{rand_v}", "Chromium";v="{rand_v}"',
+        "sec-ch-ua-mobile": "?0",
+        "sec-ch-ua-model": "",
+        "sec-ch-ua-platform": "Windows",
+        "sec-ch-ua-platform-version": "15.0.0",
+        "Upgrade-Insecure-Requests": "1",
+        "User-Agent": user_agent,
+    }
+
+
+class Identity:
+    """Headers and cookies of one exit (proxy), clearance cookies stay with the ip that earned them"""
+
+    def __init__(self, headers: dict, cookies: dict | None = None):
+        self.headers = headers
+        self.cookies = {**DEFAULT_COOKIES, **(cookies or {})}
+
+    @property
+    def user_agent(self) -> str:
+        return self.headers.get('User-Agent')
+
+    def request_headers(self) -> dict:
+        cookie = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        return {**self.headers, 'Cookie': cookie}
+
+    def update(self, set_cookies: list) -> bool:
+        """applies Set-Cookie headers, returns True if anything changed"""
+        changed = False
+        for header in set_cookies:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except Exception:
+                continue
+            for name, morsel in cookie.items():
+                if morsel['max-age'] in ('0', '-1') or not morsel.value:
+                    changed |= self.cookies.pop(name, None) is not None
+                elif self.cookies.get(name) != morsel.value:
+                    self.cookies[name] = morsel.value
+                    changed = True
+        return changed
+
+    def to_dict(self) -> dict:
+        """copies, the loop keeps changing cookies while the dict is written"""
+        return {'headers': dict(self.headers), 'cookies': dict(self.cookies)}
+
+
+class IdentityStore:
+    """
+    One Identity per proxy ('' - direct connection), created on first use.
+    With `path` identities survive restarts
+    """
+
+    def __init__(self, user_agent, path: str | None = None, logger=None):
+        """user_agent - str for every identity or callable returning a new one"""
+        self.user_agent = user_agent
+        self.PATH = path
+        self.logger = logger
+        self.identities = {}
+        self.dirty = False
+        if self.PATH:
+            self.load()
+
+    def _new(self) -> Identity:
+        user_agent = self.user_agent() if callable(self.user_agent) else self.user_agent
+        return Identity(make_headers(user_agent))
+
+    def set(self, proxy: str | None, identity: Identity):
+        self.identities[proxy or ''] = identity
+
+    def get(self, proxy: str | None) -> Identity:
+        identity = self.identities.get(proxy or '')
+        if identity is None:
+            identity = self.identities[proxy or ''] = self._new()
+            self.dirty = True
+        return identity
+
+    def headers(self, proxy: str | None) -> dict:
+        return self.get(proxy).request_headers()
+
+    def update(self, proxy: str | None, set_cookies: list):
+        if set_cookies and self.get(proxy).update(set_cookies):
+            self.dirty = True
+
+    def rotate(self, proxy: str | None) -> Identity:
+        """drops burned identity, next request through proxy gets a fresh one"""
+        self.identities.pop(proxy or '', None)
+        return self.get(proxy)
+
+    # blocking io -> call it through Executor
+
+    def load(self):
+        try:
+            with open(self.PATH, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for proxy, identity in data.items():
+            self.identities[proxy] = Identity(identity['headers'], identity.get('cookies'))
+
+    def snapshot(self) -> dict:
+        """copy for dump() in another thread, call it from the event loop"""
+        self.dirty = False
+        return {proxy: identity.to_dict() for proxy, identity in self.identities.items()}
+
+    def dump(self, data: dict | None = None):
+        if not self.PATH:
+            return
+        if data is None:
+            data = self.snapshot()
+        tmp = None
+        try:
+            # own temp file per write, concurrent dumps never interleave in one file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.PATH)),
+                                       prefix=os.path.basename(self.PATH) + '.', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.PATH)
+        except (OSError, TypeError, ValueError) as e:
+            self.dirty = True
+            if self.logger:
+                self.logger.debug(f'Identity write failed {e}')
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
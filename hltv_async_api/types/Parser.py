@@ -1,6 +1,18 @@
 import asyncio
+import copy
 import random
-from bs4 import BeautifulSoup
+import time
+from collections import deque
+
+from lxml import etree
+
+from .SingleFlight import SingleFlight
+from .RetryPolicy import Failure, PERMANENT, parse_retry_after
+from .Classifier import OK, CHALLENGE, UNEXPECTED
+from .Deadline import HltvTimeoutError, clamp, remaining, detach
+from .Cache import page_age
+from .Backend import RawPage, supports_only
+from .Scheduler import current as current_priority
 
 
 class Parser:
@@ -9,25 +21,38 @@ class Parser:
         self.client = client
         self.session = client.session
         self.executor = executor
+        self.cache = client.cache
+        self.negative = client.negative
+        self.breaker = client.breaker
+        self.policy = client.retry_policy
+        self.flight = SingleFlight()
+        # background revalidations, strong refs so they are not garbage collected
+        self.refreshes = set()
+        # background write of identities, one at a time
+        self.saving = None
+        # latencies of successful requests, used for the hedging threshold
+        self.latencies = deque(maxlen=200)
 
-    @staticmethod
-    def _f(result):
-        return BeautifulSoup(result, "lxml")
+    def _f(self, result, only=None):
+        if only is not None:
+            return self.client.backend(result, only)
+        return self.client.backend(result)
 
-    def _cloudflare_check(self, page) -> bool:
-        challenge_page = page.find(id="challenge-error-title")
-        if challenge_page is not None:
-            if "Enable JavaScript and cookies to continue" in challenge_page.get_text().strip():
-                self.logger.debug("Got cloudflare challenge page")
-                return True
-        return False
+    async def _parsed(self, result, only=None, raw: bool = False):
+        if raw or self.executor.PROCESSES:
+            # parsing happens later in one executor task together with the extractor
+            return RawPage(result, only)
+        return await self.executor.run(self._f, result, only)
 
-    def _parse_error_handler(self, delay: int = 0) -> int:
+    def _parse_error_handler(self, delay: int = 0, proxy=None, challenge: bool = False) -> int:
         if self.client.USE_PROXY:
-            self.client.switch_proxy()
+            self.client.switch_proxy(proxy, challenge)
             if not self.client.PROXY_DELAY:
                 return 0
 
+        if self.client.limiter or self.policy.BACKOFF:
+            return 0
+
         if self.client.MIN_DELAY:
             delay = random.uniform(self.client.MIN_DELAY, self.client.MAX_DELAY)
             self.logger.debug(f'Random delay {round(delay, 2)}s')
@@ -38,54 +63,347 @@ class Parser:
 
         return delay
 
-    async def _parse(self, url, delay):
-        proxy = ''
-        # setup new proxy, cuz old one was switched
-        if self.client.USE_PROXY:
-            proxy = self.client.get_proxy()
-        else:
-            # delay, only for non-proxy users. (default = 1-15s)
-            await asyncio.sleep(delay)
+    async def _read(self, response, until=None) -> tuple[bytes, bool]:
+        """
+        Reads body. With `until` chunks go through incremental lxml parser and download stops
+        as soon as until(element) is true, returns (body, truncated)
+        """
+        if until is None:
+            return await response.read(), False
+
+        until = copy.deepcopy(until)
+        parser = etree.HTMLPullParser(events=('end',))
+        chunks = []
+        async for chunk in response.iter_chunks(64 * 1024):
+            chunks.append(chunk)
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if until(element):
+                    self.logger.debug(f'Stream stopped after {sum(map(len, chunks))} bytes')
+                    return b''.join(chunks), True
+        return b''.join(chunks), False
+
+    async def _parse(self, url, delay, entry=None, proxy=None, until=None, only=None, raw=False):
+        async with self.client.concurrency_slot():
+            # lease a proxy for the whole request, concurrent requests get other proxies
+            if self.client.USE_PROXY and proxy is None:
+                async with self.client.lease_proxy() as proxy:
+                    return await self._request(url, delay, entry, proxy, until, only, raw)
+            return await self._request(url, delay, entry, proxy, until, only, raw)
+
+    async def _request(self, url, delay, entry=None, proxy=None, until=None, only=None, raw=False):
+        if self.client.limiter:
+            await self.client.limiter.acquire(url)
+        identities = self.client.identities
+        headers = identities.headers(proxy)
+        if entry is not None:
+            headers = {**headers, **entry.conditional_headers()}
+        challenge = False
+        # request timeout never outlives the caller's deadline
+        timeout = clamp(self.client.timeout)
+        start = time.monotonic()
         try:
-            async with self.session.get(url, headers=self.client.headers, proxy=proxy, timeout=self.client.timeout) as response:
+            async with self.client.transport.request('GET', url, headers=headers, proxy=proxy,
+                                                     timeout=timeout) as response:
                 self.logger.info(f"Fetching {url}, code: {response.status}")
+                identities.update(proxy, response.set_cookies())
+                if identities.dirty and identities.PATH:
+                    self._save_identities()
+                if response.status == 304 and entry is not None:
+                    self._record(proxy, time.monotonic() - start)
+                    self.cache.refresh(url, entry, response.headers)
+                    page = await self._page_of(entry, only, raw)
+                    if self.cache.PATH:
+                        await self.executor.run(self.cache.dump, url, entry)
+                    return True, page
+
+                reason = None
                 if response.status == 200:
-                    result = await response.text()
-                    page = await self.executor.run(self._f, result)
-                    forbidden = await self.executor.run(self._cloudflare_check, page)
-                    if not forbidden:
+                    result, truncated = await self._read(response, until)
+                    # reject garbage before paying for the parse
+                    reason = self.client.classifier.classify(url, result, truncated)
+                    if reason == OK:
+                        self._record(proxy, time.monotonic() - start)
+                        page = await self._parsed(result, only, raw)
+                        # partial page is useless for other extractors, don't cache it
+                        if self.cache and not truncated:
+                            # unparsed body of a fused fetch is not a page, extract() adds it after the parse
+                            entry = self.cache.set(url, result, None if raw else page, response.headers, only)
+                            if self.cache.PATH:
+                                await self.executor.run(self.cache.dump, url, entry)
                         return True, page
+                    challenge = reason == CHALLENGE
+                    self.logger.debug(f"Rejected {url}: {reason}")
+                elif response.status in (403, 503):
+                    # cloudflare serves challenges with these codes
+                    challenge = self.client.classifier.classify(url, await response.read()) == CHALLENGE
 
                 self.logger.debug(f"Error, Code {response.status=}")
-                return False, await self.executor.run(self._parse_error_handler, delay)
+                if challenge or response.status in (403, 429):
+                    self.client.adapt(proxy, False)
+                failure = Failure(status=response.status, challenge=challenge, reason=reason,
+                                  retry_after=parse_retry_after(response.headers.get('Retry-After')))
+                if self.policy.classify(failure) == PERMANENT:
+                    # proxy did its job, page just doesn't exist
+                    self.client.report_proxy(proxy, True, time.monotonic() - start)
+                else:
+                    failure.delay = self._parse_error_handler(delay, proxy, challenge)
+                return False, failure
 
         except Exception as e:
             self.logger.debug(e)
 
-        delay = self._parse_error_handler(delay)
-        return False, delay
+        return False, Failure(self._parse_error_handler(delay, proxy))
+
+    def _save_identities(self):
+        """writes identities off the request path, changes made during a write go with the next one"""
+        if self.saving is not None and not self.saving.done():
+            return
+        identities = self.client.identities
+        self.saving = asyncio.ensure_future(self.executor.run(identities.dump, identities.snapshot()))
+
+    def _record(self, proxy, latency):
+        self.latencies.append(latency)
+        self.client.report_proxy(proxy, True, latency)
+        self.client.adapt(proxy, True)
+
+    def _hedge_after(self) -> float:
+        if len(self.latencies) < 20:
+            return self.client.HEDGE_DELAY
+        latencies = sorted(self.latencies)
+        return latencies[min(int(len(latencies) * self.client.HEDGE_PERCENTILE), len(latencies) - 1)]
+
+    async def _hedged(self, url, delay, entry=None, until=None, only=None, raw=False):
+        """
+        Fires a duplicate request on another proxy if the first one is slower than the latency percentile,
+        first success wins, loser is cancelled
+        """
+        pool = self.client.pool
+        proxy = await pool.acquire()
+        second_proxy = None
+        start = time.monotonic()
+        first = asyncio.ensure_future(self._parse(url, delay, entry, proxy, until, only, raw))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_after())
+            if done:
+                return first.result()
+
+            second_proxy = pool.try_acquire(exclude={proxy})
+            if second_proxy is None:
+                return await first
+            self.logger.debug(f"Hedging {url} via {second_proxy if second_proxy else 'No Proxy'}")
+            tasks.add(asyncio.ensure_future(self._parse(url, delay, entry, second_proxy, until, only, raw)))
+
+            result = False, Failure(delay)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result[0]:
+                        if task is not first and not first.done():
+                            # slow proxy lost the race, let the pool know how slow it was
+                            pool.observe(proxy, time.monotonic() - start)
+                        return result
+            return result
+        finally:
+            for task in tasks:
+                task.cancel()
+            # leases live until the requests are really gone
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for leased in (proxy, second_proxy):
+                if leased is not None:
+                    await pool.release(leased)
+
+    async def _page_of(self, entry, only=None, raw: bool = False):
+        # full page serves every filter
+        page = entry.page if only is None or entry.page is not None else entry.pages.get(only.key)
+        if page is not None:
+            return page
+        if raw:
+            # fused fetch parses the body together with its extractor, extract() keeps the page
+            return RawPage(entry.body, only)
+        if only is None:
+            entry.page = await self._parsed(entry.body)
+            return entry.page
+        page = entry.pages[only.key] = await self._parsed(entry.body, only)
+        return page
+
+    async def _from_cache(self, url):
+        entry = self.cache.get(url)
+        if entry is None and self.cache.PATH:
+            entry = await self.executor.run(self.cache.load, url)
+            if entry is not None:
+                entry = self.cache.promote(url, entry)
+        if entry is None:
+            return None
+
+        self.logger.debug(f'Cache hit {url}')
+        return entry
 
-    async def fetch(self, url, delay: int = 0):
+    def _servable(self, entry) -> bool:
+        return bool(self.client.MAX_STALE) and entry.staleness <= self.client.MAX_STALE
+
+    def _revalidate(self, url, delay, entry):
+        """refreshes stale entry in background, one refresh per url at a time"""
+        async def _refresh():
+            # refresh must not die with the deadline of the caller who triggered it
+            detach()
+            if self.breaker is None or self.breaker.allow(url):
+                await self.flight.do(('refresh', url), self._guarded, url, delay, None, entry)
+
+        task = asyncio.ensure_future(_refresh())
+        self.refreshes.add(task)
+        task.add_done_callback(self.refreshes.discard)
+
+    async def fetch(self, url, delay: int = 0, until=None, only=None, extract=None):
+        """
+        :params:
+        until - early abort condition (StopAfter), used only in streaming mode
+        only - subtrees the caller reads (Only), used only by the bs4 backend
+        extract - (func, args), the page is parsed and func(page, *args) is run in one executor task,
+        its result is returned instead of the page
+        """
+        until = until if self.client.STREAM else None
+        only = only if supports_only(self.client.backend) else None
+        raw = extract is not None
+        # concurrent fetches of one url share a single download + parse
+        key = url if until is None and only is None and not raw else \
+            (url, until and until.key, only and only.key, raw)
+        if self.client.scheduler is not None:
+            # shared task queues with the priority of its first caller, lanes don't share
+            key = (key, current_priority())
+        # shared fetch runs until the latest deadline of its callers, its timeout is final for all of them
+        page, age = await self.flight.do(key, self._fetch, url, delay, until, only, raw)
+        page_age.set(age)
+        if raw and page is not None:
+            return await self.extract(extract, page, url)
+        return page
+
+    async def extract(self, extract, page, url=None):
+        func, args = extract
+        if not isinstance(page, RawPage):
+            return await self.executor.run(func, page, *args)
+        if self.executor.PROCESSES:
+            # page stays in the worker, pickling it back would cost more than a parse
+            return await self.executor.extract(self.client.backend, func, page, *args)
+        parsed, result = await self.executor.parse_extract(self.client.backend, func, page, *args)
+        if url is not None and self.cache:
+            self._keep(url, page, parsed)
+        return result
+
+    def _keep(self, url, raw, page):
+        """page parsed by a fused fetch goes to the cache entry of its body, next hits skip the parse"""
+        entry = self.cache.peek(url)
+        # refetched or evicted meanwhile, the entry holds another body
+        if entry is None or entry.body is not raw.body:
+            return
+        if raw.only is None:
+            entry.page = page
+        else:
+            entry.pages.setdefault(raw.only.key, page)
+
+    async def _fetch(self, url, delay: int = 0, until=None, only=None, raw=False):
+        """returns (page, age)"""
+        stale = None
+        if self.cache:
+            entry = await self._from_cache(url)
+            if entry is not None:
+                return await self._page_of(entry, only, raw), entry.age
+            stale = self.cache.peek(url)
+            if stale is not None and self.client.STALE_WHILE_REVALIDATE and self._servable(stale):
+                self.logger.debug(f'Serving stale {url}, revalidating in background')
+                self._revalidate(url, delay, stale)
+                return await self._page_of(stale, only, raw), stale.age
+
+        if self.negative is not None:
+            failure = self.negative.get(url)
+            if failure is not None:
+                self.logger.debug(f'Known bad url {url}: {failure}')
+                return None, 0
+
+        if self.breaker is None or self.breaker.allow(url):
+            status, result = await self._guarded(url, delay, until, stale, only, raw)
+            if status:
+                return result, 0
+        else:
+            self.logger.warning(f'Circuit open, not fetching {url}')
+
+        if stale is not None and self._servable(stale) and self.cache.peek(url) is stale:
+            self.logger.warning(f'Upstream failed, serving stale {url} ({round(stale.age)}s old)')
+            return await self._page_of(stale, only, raw), stale.age
+        return None, 0
+
+    async def _guarded(self, url, delay: int = 0, until=None, stale=None, only=None, raw=False):
+        """download with circuit breaker and negative cache bookkeeping"""
+        try:
+            status, result = await self._download(url, delay, until, stale, only, raw)
+        except HltvTimeoutError:
+            if self.breaker is not None:
+                self.breaker.abort(url)
+            if stale is None or not self._servable(stale):
+                raise
+            return False, None
+        except BaseException:
+            if self.breaker is not None:
+                self.breaker.abort(url)
+            raise
+
+        permanent = not status and result is not None and self.policy.classify(result) == PERMANENT
+        if self.breaker is not None:
+            # bad id is not the endpoint's fault
+            self.breaker.report(url, status or permanent)
+        if self.negative is not None and not status and result is not None and (
+                permanent or result.reason == UNEXPECTED):
+            self.negative.set(url, result)
+        return status, result
+
+    async def _download(self, url, delay: int = 0, until=None, stale=None, only=None, raw=False):
+        """retry loop, returns (True, page) or (False, last Failure)"""
         if not self.session:
             self.client._create_session()
         status = False
         try_ = 1
         result = None
+        self.policy.on_request()
 
-        # parse until success or not max retries
-        while (not status) and (try_ != self.client.max_retries):
+        # parse until success, permanent error or no retries left
+        while True:
             self.logger.debug(f'Trying connect to {url}, try {try_}/{self.client.max_retries}')
 
             # if status = True, result = page,
-            # if status = False, result = delay (default=0)
-            status, result = await self._parse(url, delay)
+            # if status = False, result = Failure
+            if self.client.HEDGE and self.client.pool is not None and len(self.client.pool) > 1:
+                status, result = await self._hedged(url, delay, stale, until, only, raw)
+            else:
+                status, result = await self._parse(url, delay, stale, until=until, only=only, raw=raw)
+
+            if status:
+                return status, result
+
+            if self.policy.classify(result) == PERMANENT:
+                self.logger.error(f'Permanent error {result.status}, not retrying {url}')
+                if stale is not None:
+                    # page is gone, don't keep serving it
+                    self.cache.discard(url)
+                return status, result
 
-            if not status and result:
-                delay = result
             try_ += 1
+            if not self.policy.attempts_left(try_):
+                break
+            if not self.policy.allow_retry():
+                self.logger.warning('Retry budget exhausted')
+                break
 
-        if status:
-            return result
-        else:
-            self.logger.error('Connection failed')
-            return None
+            delay = result.delay
+            sleep = self.policy.delay(try_ - 1, result)
+            left = remaining()
+            if left is not None and left <= sleep:
+                # no time for another attempt, fail now instead of sleeping into the deadline
+                raise HltvTimeoutError(f'Deadline exceeded fetching {url}')
+            if sleep:
+                self.logger.debug(f'Retrying in {round(sleep, 2)}s')
+                await asyncio.sleep(sleep)
+
+        self.logger.error('Connection failed')
+        return status, result
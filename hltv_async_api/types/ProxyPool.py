@@ -0,0 +1,214 @@
+import asyncio
+import random
+import time
+
+
+class Proxy:
+    def __init__(self, url: str):
+        self.url = url
+        self.success = 0
+        self.fail = 0
+        self.challenges = 0
+        self.latency = None  # EWMA, seconds
+        self.failures_in_row = 0
+        self.trips = 0
+        self.cooldown_until = 0.0
+        self.active = 0
+        # AIMDLimit in adaptive mode
+        self.limit = None
+
+    @property
+    def requests(self) -> int:
+        return self.success + self.fail
+
+    @property
+    def success_rate(self) -> float:
+        # laplace smoothing, unknown proxies start at 0.5
+        return (self.success + 1) / (self.requests + 2)
+
+    @property
+    def challenge_rate(self) -> float:
+        return self.challenges / self.requests if self.requests else 0.0
+
+    def available(self, now: float | None = None) -> bool:
+        return (now or time.monotonic()) >= self.cooldown_until
+
+    def score(self, default_latency: float = 1.0) -> float:
+        latency = self.latency if self.latency is not None else default_latency
+        return self.success_rate * (1 - self.challenge_rate) / max(latency, 0.01)
+
+    def load_score(self, default_latency: float = 1.0) -> float:
+        # spread concurrent requests instead of piling them on the best proxy
+        return self.score(default_latency) / (1 + self.active)
+
+    def __repr__(self):
+        return (f"Proxy({self.url!r}, ok={self.success}, fail={self.fail}, "
+                f"challenges={self.challenges}, latency={self.latency}, active={self.active}"
+                + (f", limit={self.limit.permits})" if self.limit is not None else ")"))
+
+
+class ProxyPool:
+    """
+    Proxies with health stats. get() routes to the best available proxy,
+    failing proxies are ejected for a cooldown (circuit breaker) which doubles on every trip.
+    lease() reserves a proxy for the lifetime of a request, `slots` limits concurrent requests per proxy (0 = no limit),
+    `limit` - factory of AIMDLimit, adaptive concurrency limit per proxy
+    """
+
+    def __init__(self,
+                 proxies: list,
+                 remove: bool = False,
+                 max_failures: int = 3,
+                 cooldown: float = 30.0,
+                 max_cooldown: float = 600.0,
+                 alpha: float = 0.3,
+                 slots: int = 0,
+                 limit=None,
+                 logger=None,
+                 ):
+        self.logger = logger
+        self.REMOVE = remove
+        self.MAX_FAILURES = max_failures
+        self.COOLDOWN = cooldown
+        self.MAX_COOLDOWN = max_cooldown
+        self.ALPHA = alpha
+        self.SLOTS = slots
+        self.LIMIT = limit
+        self.proxies = {url: self._new(url) for url in proxies}
+        self.released = asyncio.Condition()
+
+    def _new(self, url: str) -> Proxy:
+        proxy = Proxy(url)
+        if self.LIMIT is not None:
+            proxy.limit = self.LIMIT()
+        return proxy
+
+    def __len__(self):
+        return len(self.proxies)
+
+    @property
+    def urls(self) -> list:
+        return list(self.proxies)
+
+    def _default_latency(self) -> float:
+        known = sorted(p.latency for p in self.proxies.values() if p.latency is not None)
+        return known[len(known) // 2] if known else 1.0
+
+    def get(self, exclude=()) -> str | None:
+        candidates = [p for p in self.proxies.values() if p.url not in exclude]
+        if not candidates:
+            return None
+
+        now = time.monotonic()
+        available = [p for p in candidates if p.available(now)]
+        if not available:
+            # everyone is cooling down, probe the one which recovers first (half-open)
+            return min(candidates, key=lambda p: p.cooldown_until).url
+
+        default = self._default_latency()
+        return max(available, key=lambda p: (p.score(default), random.random())).url
+
+    def _free(self, proxy: Proxy) -> bool:
+        if proxy.limit is not None and proxy.active >= proxy.limit.permits:
+            return False
+        return not self.SLOTS or proxy.active < self.SLOTS
+
+    def try_acquire(self, exclude=()) -> str | None:
+        """takes a slot on the best proxy with a free one, None if all are busy"""
+        candidates = [p for p in self.proxies.values() if p.url not in exclude]
+        if not candidates:
+            return None
+
+        now = time.monotonic()
+        available = [p for p in candidates if p.available(now)]
+        if available:
+            available = [p for p in available if self._free(p)]
+            if not available:
+                return None
+            default = self._default_latency()
+            proxy = max(available, key=lambda p: (p.load_score(default), random.random()))
+        else:
+            # everyone is cooling down, probe the one which recovers first (half-open)
+            proxy = min(candidates, key=lambda p: p.cooldown_until)
+        proxy.active += 1
+        return proxy.url
+
+    async def acquire(self, exclude=()) -> str | None:
+        """waits for a free slot, None only if there are no proxies left"""
+        async with self.released:
+            while True:
+                if not any(url not in exclude for url in self.proxies):
+                    return None
+                url = self.try_acquire(exclude)
+                if url is not None:
+                    return url
+                await self.released.wait()
+
+    async def release(self, url: str):
+        proxy = self.proxies.get(url)
+        if proxy is not None and proxy.active:
+            proxy.active -= 1
+        async with self.released:
+            self.released.notify_all()
+
+    def report(self, url: str, ok: bool, latency: float | None = None, challenge: bool = False):
+        proxy = self.proxies.get(url)
+        if proxy is None:
+            return
+
+        if latency is not None:
+            self.observe(url, latency)
+
+        if ok:
+            proxy.success += 1
+            proxy.failures_in_row = 0
+            proxy.trips = 0
+            return
+
+        proxy.fail += 1
+        proxy.failures_in_row += 1
+        if challenge:
+            proxy.challenges += 1
+
+        if self.REMOVE:
+            self.remove(url)
+        elif proxy.failures_in_row >= self.MAX_FAILURES:
+            proxy.trips += 1
+            cooldown = min(self.COOLDOWN * 2 ** (proxy.trips - 1), self.MAX_COOLDOWN)
+            proxy.cooldown_until = time.monotonic() + cooldown
+            proxy.failures_in_row = 0
+            if self.logger:
+                self.logger.debug(f"Ejecting proxy {url or 'No Proxy'} for {cooldown}s")
+
+    def adapt(self, url: str, ok: bool):
+        """feeds adaptive limit of the proxy, ok=False only for block signals (403, 429, challenge)"""
+        proxy = self.proxies.get(url)
+        if proxy is None or proxy.limit is None:
+            return
+        if ok:
+            proxy.limit.on_success()
+        elif proxy.limit.on_block() and self.logger:
+            self.logger.debug(f"Proxy {url or 'No Proxy'} limit lowered to {proxy.limit.permits}")
+
+    def observe(self, url: str, latency: float):
+        """latency sample without success / failure, e.g. a hedged request which lost the race"""
+        proxy = self.proxies.get(url)
+        if proxy is not None:
+            proxy.latency = latency if proxy.latency is None else \
+                self.ALPHA * latency + (1 - self.ALPHA) * proxy.latency
+
+    def eject(self, url: str, cooldown: float | None = None):
+        proxy = self.proxies.get(url)
+        if proxy is not None:
+            proxy.cooldown_until = time.monotonic() + (cooldown or self.COOLDOWN)
+
+    def update(self, urls: list):
+        """replaces proxy list, known proxies keep their stats"""
+        self.proxies = {url: self.proxies.get(url) or self._new(url) for url in urls}
+
+    def remove(self, url: str):
+        if self.proxies.pop(url, None) is not None and self.logger:
+            self.logger.debug(f"Removing proxy {url or 'No Proxy'}")
+
+    def stats(self) -> list:
+        return sorted(self.proxies.values(), key=lambda p: p.score(self._default_latency()), reverse=True)
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1, fair: bool = True):
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        # asyncio.Lock wakes waiters in FIFO order
+        self.lock = asyncio.Lock() if fair else None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def _take(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        if self.lock is None:
+            return await self._take()
+        async with self.lock:
+            await self._take()
+
+
+class RateLimiter:
+    """
+    Global token bucket per host, plus optional buckets per path prefix.
+    rules: {'/stats': 0.2} or {'/stats': (0.2, 2)} - (rate, burst) for urls starting with prefix
+    """
+
+    def __init__(self, rate: float, burst: int = 1, rules: dict | None = None, fair: bool = True):
+        self.RATE = rate
+        self.BURST = burst
+        self.FAIR = fair
+        self.RULES = {}
+        for prefix, rule in (rules or {}).items():
+            self.RULES[prefix] = rule if isinstance(rule, (tuple, list)) else (rule, 1)
+        self.buckets = {}
+
+    def _bucket(self, key, rate, burst) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(rate, burst, self.FAIR)
+        return bucket
+
+    async def acquire(self, url: str):
+        parts = urlsplit(url)
+        # hltv.org and www.hltv.org are one site, one budget
+        host = (parts.hostname or '').removeprefix('www.')
+        for prefix, (rate, burst) in self.RULES.items():
+            if parts.path.startswith(prefix):
+                await self._bucket((host, prefix), rate, burst).acquire()
+                break
+        await self._bucket(host, self.RATE, self.BURST).acquire()
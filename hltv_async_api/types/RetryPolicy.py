@@ -0,0 +1,101 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+OK = 'ok'
+RETRY = 'retry'
+PERMANENT = 'permanent'
+
+
+class Failure:
+    """failed attempt, `delay` is the legacy min/max delay computed by Parser"""
+
+    def __init__(self, delay: float = 0, status: int | None = None, retry_after: float | None = None,
+                 challenge: bool = False, reason: str | None = None):
+        self.delay = delay
+        self.status = status
+        self.retry_after = retry_after
+        self.challenge = challenge
+        self.reason = reason
+
+    def __repr__(self):
+        return (f'Failure(status={self.status}, reason={self.reason}, challenge={self.challenge}, '
+                f'retry_after={self.retry_after})')
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed request is retried.
+    :params:
+    max_retries - same meaning as Hltv(max_retries), 0 for infinity
+    backoff - exponential backoff, base * 2 ** attempt capped by `cap`. False keeps min_delay / max_delay behaviour
+    jitter - full jitter, random delay between 0 and backoff
+    budget - retries allowed per first attempt across the whole client (e.g. 0.2), None disables
+    budget_min - retries always available in the budget
+    statuses - per status overrides {404: 'permanent', 403: 'retry'}
+    """
+
+    PERMANENT_STATUSES = {400, 401, 404, 405, 410, 414, 451}
+
+    def __init__(self,
+                 max_retries: int = 10,
+                 backoff: bool = False,
+                 base: float = 0.5,
+                 cap: float = 30.0,
+                 jitter: bool = True,
+                 budget: float | None = None,
+                 budget_min: float = 10.0,
+                 statuses: dict | None = None,
+                 ):
+        self.max_retries = max_retries
+        self.BACKOFF = backoff
+        self.BASE = base
+        self.CAP = cap
+        self.JITTER = jitter
+        self.BUDGET = budget
+        self.BUDGET_MIN = budget_min
+        self.STATUSES = statuses or {}
+        self.tokens = budget_min
+
+    def attempts_left(self, try_: int) -> bool:
+        return self.max_retries == 0 or try_ < self.max_retries
+
+    def classify(self, failure: Failure) -> str:
+        if failure.status in self.STATUSES:
+            return self.STATUSES[failure.status]
+        if failure.status in self.PERMANENT_STATUSES:
+            return PERMANENT
+        return RETRY
+
+    def on_request(self):
+        if self.BUDGET is not None:
+            self.tokens = min(self.tokens + self.BUDGET, self.BUDGET_MIN + 100 * self.BUDGET)
+
+    def allow_retry(self) -> bool:
+        if self.BUDGET is None:
+            return True
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def delay(self, attempt: int, failure: Failure) -> float:
+        if failure.retry_after is not None:
+            return min(failure.retry_after, self.CAP)
+        if not self.BACKOFF:
+            return failure.delay
+        delay = min(self.CAP, self.BASE * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.JITTER else delay
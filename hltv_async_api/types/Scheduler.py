@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+
+HIGH = 'high'
+NORMAL = 'normal'
+LOW = 'low'
+
+RANK = {HIGH: 0, NORMAL: 1, LOW: 2}
+
+# priority of the current call, inherited by tasks it spawns
+_priority: ContextVar[str] = ContextVar('hltv_priority', default=NORMAL)
+
+
+def current() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority(level: str):
+    """every request made inside runs with this priority"""
+    if level not in RANK:
+        raise ValueError(f'Unknown priority {level}, use high | normal | low')
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class Scheduler:
+    """
+    Limits concurrent requests to `slots`, queued requests start in priority order (high > normal > low).
+    Low priority only uses spare capacity: `reserve` slots are kept for high and normal
+    """
+
+    def __init__(self, slots: int, reserve: int | None = None):
+        self.SLOTS = slots
+        self.RESERVE = min(max(1, slots // 4) if reserve is None else reserve, slots - 1)
+        self.active = 0
+        # heap of (rank, seq, future)
+        self.waiting = []
+        self.seq = itertools.count()
+
+    def _can_start(self, rank: int) -> bool:
+        limit = self.SLOTS - self.RESERVE if rank == RANK[LOW] else self.SLOTS
+        return self.active < limit
+
+    async def acquire(self, level: str | None = None):
+        rank = RANK[level or current()]
+        # nobody of the same or higher priority queued -> start right away
+        if self._can_start(rank) and not (self.waiting and self.waiting[0][0] <= rank):
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (rank, next(self.seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # slot was granted just before cancellation
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self.waiting:
+            rank, _, future = self.waiting[0]
+            if future.done():
+                heapq.heappop(self.waiting)
+                continue
+            # head has the best priority, if it can't start nobody can
+            if not self._can_start(rank):
+                break
+            heapq.heappop(self.waiting)
+            self.active += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, level: str | None = None):
+        await self.acquire(level)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queued(self) -> dict:
+        """waiting requests per priority"""
+        names = {rank: name for name, rank in RANK.items()}
+        counts = {name: 0 for name in RANK}
+        for rank, _, future in self.waiting:
+            if not future.done():
+                counts[names[rank]] += 1
+        return counts
@@ -0,0 +1,125 @@
+import re
+
+import soupsieve
+from lxml import etree
+
+from .Backend import LxmlNode, _class_predicate, _literal
+
+
+_STEP = re.compile(r'([\w-]+|\*)?((?:\.[\w-]+)*)((?:\[[\w-]+(?:=[^\]]*)?\])*)$')
+_ATTR = re.compile(r'\[([\w-]+)(?:=([^\]]*))?\]')
+
+
+def to_xpath(css: str) -> str:
+    """
+    css subset -> xpath: steps tag.class.class[attr][attr=value] joined by ' ' (descendant) or ' > ' (child),
+    class matches a single class token like in css
+    """
+    path = []
+    axis = 'descendant'
+    for token in css.split():
+        if token == '>':
+            axis = 'child'
+            continue
+        match = _STEP.match(token)
+        if match is None:
+            raise ValueError(f'Unsupported selector {css}')
+        tag, classes, attrs = match.groups()
+        predicates = [_class_predicate(cls) for cls in classes.split('.') if cls]
+        for name, value in _ATTR.findall(attrs):
+            value = value.strip('"\'')
+            predicates.append(f'@{name}={_literal(value)}' if value else f'@{name}')
+        path.append(f"{axis}::{tag or '*'}" + ''.join(f'[{p}]' for p in predicates))
+        axis = 'descendant'
+    return '/'.join(path)
+
+
+class Selector:
+    """css selector compiled once for both backends: XPath for lxml pages, soupsieve for bs4 pages"""
+
+    __slots__ = ('css', 'xpath', 'soup')
+
+    def __init__(self, css: str):
+        self.css = css
+        self.xpath = etree.XPath(to_xpath(css))
+        self.soup = soupsieve.compile(css)
+
+    def select(self, node, limit: int | None = None) -> list:
+        """limit - max elements, None - all"""
+        if isinstance(node, LxmlNode):
+            element = node.element
+            if isinstance(element, etree._ElementTree):
+                element = element.getroot()
+            found = self.xpath(element)
+            return [LxmlNode(e) for e in (found if limit is None else found[:limit])]
+        if limit is None:
+            return self.soup.select(node)
+        # soupsieve reads limit 0 as no limit
+        return self.soup.select(node, limit=limit) if limit > 0 else []
+
+    def __repr__(self):
+        return f'Selector({self.css!r})'
+
+
+class Field:
+    """
+    One value of an item: text (or `attr`) of the first element matching `css`
+    :params:
+    css - selector inside the item, tuple - alternatives tried in order, None - the item itself
+    transform - applied to the raw string
+    optional - missing element / attribute or failed transform gives `default` instead of AttributeError
+    many - list of values of every matching element
+    """
+
+    def __init__(self, css=None, attr: str | None = None, transform=None,
+                 optional: bool = False, default=None, many: bool = False):
+        alternatives = (css,) if isinstance(css, str) else tuple(css or ())
+        self.selectors = tuple(Selector(c) for c in alternatives)
+        self.attr = attr
+        self.transform = transform
+        self.optional = optional
+        self.default = default
+        self.many = many
+
+    def _nodes(self, item) -> list:
+        if not self.selectors:
+            return [item]
+        for selector in self.selectors:
+            nodes = selector.select(item, None if self.many else 1)
+            if nodes:
+                return nodes
+        return []
+
+    def _value(self, node):
+        value = node.text if self.attr is None else node.get(self.attr)
+        if value is None:
+            raise AttributeError(f'{node.name} has no {self.attr}')
+        return self.transform(value) if self.transform else value
+
+    def extract(self, item):
+        nodes = self._nodes(item)
+        if self.many:
+            return [self._value(node) for node in nodes]
+        try:
+            if not nodes:
+                raise AttributeError(f'{self.selectors} not found')
+            return self._value(nodes[0])
+        except (AttributeError, IndexError, KeyError, ValueError, TypeError):
+            if self.optional:
+                return self.default
+            raise
+
+
+class Schema:
+    """
+    List of items: every element matching `css` becomes a dict of `fields` (Field or nested Schema).
+    Selectors are compiled when the schema is created, define schemas at module level
+    """
+
+    def __init__(self, css: str, fields: dict):
+        self.selector = Selector(css)
+        self.fields = fields
+
+    def extract(self, node, limit: int | None = None) -> list[dict]:
+        return [{name: field.extract(item) for name, field in self.fields.items()}
+                for item in self.selector.select(node, limit)]
@@ -0,0 +1,40 @@
+import asyncio
+
+from .Deadline import SharedDeadline
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, every caller awaits one shared task.
+    The task runs until the latest deadline of its callers and is cancelled when the last one leaves
+    """
+
+    def __init__(self):
+        # key -> (future, SharedDeadline)
+        self.calls = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        call = self.calls.get(key)
+        if call is None:
+            deadline = SharedDeadline()
+            future = asyncio.ensure_future(deadline.run(func(*args, **kwargs)))
+            call = self.calls[key] = (future, deadline)
+            future.add_done_callback(lambda f: self._done(key, f))
+        future, deadline = call
+        token = deadline.join()
+        try:
+            # shield: one cancelled caller must not cancel the call for the others
+            return await asyncio.shield(future)
+        finally:
+            deadline.leave(token)
+            if not deadline.waiters and not future.done():
+                # nobody waits for the result, don't keep retrying in background
+                future.cancel()
+
+    def _done(self, key, future):
+        call = self.calls.get(key)
+        if call is not None and call[0] is future:
+            del self.calls[key]
+
+    def __len__(self):
+        return len(self.calls)
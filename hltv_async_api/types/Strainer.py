@@ -0,0 +1,32 @@
+import re
+
+from bs4 import SoupStrainer
+
+
+class Only:
+    """
+    Subtrees an extractor reads, the parser builds only them (and everything inside).
+    Rules are tag names or (tag, class) pairs, class is a single class token:
+    Only(('div', 'ranked-team')), Only('tbody')
+    """
+
+    def __init__(self, *rules):
+        self.rules = tuple(rule if isinstance(rule, tuple) else (rule, None) for rule in rules)
+
+    @property
+    def key(self) -> tuple:
+        return ('only',) + self.rules
+
+    def strainer(self) -> SoupStrainer:
+        # one SoupStrainer takes one name and one class filter, so the rules are merged:
+        # tags x classes is a superset of the pairs, extra subtrees never hide needed ones
+        names = sorted({tag for tag, _ in self.rules})
+        classes = {cls for _, cls in self.rules}
+        if None in classes:
+            return SoupStrainer(names)
+        # class attribute reaches the strainer unsplit while parsing, match tokens with a pattern
+        tokens = '|'.join(re.escape(cls) for cls in sorted(classes))
+        return SoupStrainer(names, class_=re.compile(rf'(^|\s)({tokens})(\s|$)'))
+
+    def __repr__(self):
+        return f'Only{self.rules}'
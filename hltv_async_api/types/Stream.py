@@ -0,0 +1,61 @@
+def _classes(element) -> list:
+    return (element.get('class') or '').split()
+
+
+class StopAfter:
+    """
+    Early abort condition for streaming mode, true after `count` closed <tag> elements
+    :params:
+    cls - count only elements with this class
+    outside - skip elements nested in an element with this class
+    parent - count only direct children of this tag
+    having - (tag, cls, n), count only elements with at least n such descendants
+    """
+
+    def __init__(self, tag: str, cls: str | None = None, count: int = 1,
+                 outside: str | None = None, parent: str | None = None, having: tuple | None = None):
+        self.tag = tag
+        self.cls = cls
+        self.count = count
+        self.outside = outside
+        self.parent = parent
+        self.having = having
+        self.seen = 0
+
+    @property
+    def key(self) -> tuple:
+        return 'stop', self.tag, self.cls, self.count, self.outside, self.parent, self.having
+
+    def __call__(self, element) -> bool:
+        if element.tag != self.tag:
+            return False
+        if self.cls and self.cls not in _classes(element):
+            return False
+        if self.parent:
+            parent = element.getparent()
+            if parent is None or parent.tag != self.parent:
+                return False
+        if self.outside and any(self.outside in _classes(a) for a in element.iterancestors()):
+            return False
+        if self.having:
+            tag, cls, n = self.having
+            # 'end' event, the subtree is complete
+            if sum(1 for d in element.iterdescendants(tag) if cls in _classes(d)) < n:
+                return False
+        self.seen += 1
+        return self.seen >= self.count
+
+
+class AnyOf:
+    """stops when any of conditions is met"""
+
+    def __init__(self, *stops):
+        self.stops = stops
+
+    @property
+    def key(self) -> tuple:
+        return ('any',) + tuple(stop.key for stop in self.stops)
+
+    def __call__(self, element) -> bool:
+        # evaluate every condition, each one keeps its own counter
+        return any([stop(element) for stop in self.stops])
@@ -0,0 +1,120 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TransportResponse(ABC):
+    """common response for every transport"""
+    status: int
+    headers: dict
+
+    @abstractmethod
+    async def read(self) -> bytes:
+        ...
+
+    @abstractmethod
+    def iter_chunks(self, size: int):
+        ...
+
+    @abstractmethod
+    def set_cookies(self) -> list:
+        """raw Set-Cookie headers, cookies are kept per identity by Client, not by the transport"""
+
+
+class Transport(ABC):
+    """
+    HTTP backend used by Parser. request() is an async context manager yielding TransportResponse,
+    proxy '' or None means direct connection.
+    """
+
+    @abstractmethod
+    def request(self, method: str, url: str, headers: dict | None = None, proxy: str | None = None,
+                timeout: float | None = None):
+        ...
+
+    async def close(self):
+        pass
+
+
+class AiohttpResponse(TransportResponse):
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status
+        self.headers = response.headers
+
+    async def read(self) -> bytes:
+        return await self.response.read()
+
+    def iter_chunks(self, size: int):
+        return self.response.content.iter_chunked(size)
+
+    def set_cookies(self) -> list:
+        return self.headers.getall('Set-Cookie', [])
+
+
+class AiohttpTransport(Transport):
+    """default, uses Client session"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, proxy=None, timeout=None):
+        async with self.client.get_session().request(method, url, headers=headers, proxy=proxy or None,
+                                                     timeout=timeout) as response:
+            yield AiohttpResponse(response)
+
+
+class HttpxResponse(TransportResponse):
+    def __init__(self, response):
+        self.response = response
+        self.status = response.status_code
+        self.headers = response.headers
+
+    async def read(self) -> bytes:
+        return await self.response.aread()
+
+    def iter_chunks(self, size: int):
+        return self.response.aiter_bytes(size)
+
+    def set_cookies(self) -> list:
+        return self.headers.get_list('set-cookie')
+
+
+class HttpxTransport(Transport):
+    """
+    httpx backend, HTTP/2 multiplexes requests over one connection per proxy.
+    Needs hltv_async_api[http2]
+    """
+
+    def __init__(self, http2: bool = True, max_connections: int = 100, keepalive_expiry: float = 15.0):
+        if httpx is None:
+            raise ImportError("You need to install hltv_async_api[http2]")
+        self.HTTP2 = http2
+        self.limits = httpx.Limits(max_connections=max_connections, keepalive_expiry=keepalive_expiry)
+        self.clients = {}
+
+    def _client(self, proxy):
+        # httpx binds proxy to client, so one client (and connection pool) per proxy
+        client = self.clients.get(proxy)
+        if client is None:
+            # jar that accepts nothing, cookies go through Cookie header of the identity
+            client = self.clients[proxy] = httpx.AsyncClient(http2=self.HTTP2, proxy=proxy or None,
+                                                             limits=self.limits, follow_redirects=True,
+                                                             cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])))
+        return client
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, proxy=None, timeout=None):
+        async with self._client(proxy or '').stream(method, url, headers=headers, timeout=timeout) as response:
+            yield HttpxResponse(response)
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
@@ -1,3 +1,19 @@
 from .Parser import Parser
 from .Client import Client
-from .Executor import Executor
\ No newline at end of file
+from .Executor import Executor
+from .Cache import Cache, NegativeCache
+from .SingleFlight import SingleFlight
+from .RateLimiter import RateLimiter
+from .ProxyPool import ProxyPool
+from .Stream import StopAfter, AnyOf
+from .RetryPolicy import RetryPolicy
+from .Classifier import Classifier
+from .Transport import Transport, TransportResponse, AiohttpTransport, HttpxTransport
+from .Deadline import HltvTimeoutError
+from .CircuitBreaker import CircuitBreaker
+from .Identity import Identity, IdentityStore
+from .Concurrency import AIMDLimit, AdaptiveLimiter
+from .Scheduler import Scheduler
+from .Backend import LxmlNode, RawPage, get_backend
+from .Strainer import Only
+from .Schema import Schema, Field
@@ -24,7 +24,10 @@ setup(
         ],
         'beta': [
             'uvloop',
-        ]
+        ],
+        'http2': [
+            'httpx[http2]',
+        ],
     },
     classifiers=[
         'Programming Language :: Python :: 3',
@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from hltv_async_api.types.Transport import Transport, TransportResponse
+
+
+class FakeResponse(TransportResponse):
+    def __init__(self, status: int, headers: dict, body: bytes = b''):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def iter_chunks(self, size: int):
+        yield self.body
+
+    def set_cookies(self) -> list:
+        return []
+
+
+class FakeTransport(Transport):
+    """counts requests, answers `status` with `body` after `latency` seconds or raises when `fail` is set"""
+
+    def __init__(self, status: int = 503, headers: dict | None = None, latency: float = 0, fail: bool = False,
+                 body: bytes = b''):
+        self.status = status
+        self.headers = headers or {}
+        self.latency = latency
+        self.fail = fail
+        self.body = body
+        self.timeouts = []
+        self.urls = []
+        # url -> asyncio.Event, requests for the url wait until it is set
+        self.gates = {}
+
+    @property
+    def requests(self) -> int:
+        return len(self.timeouts)
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, proxy=None, timeout=None):
+        self.timeouts.append(timeout)
+        self.urls.append(url)
+        if url in self.gates:
+            await self.gates[url].wait()
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise OSError('connection reset')
+        yield FakeResponse(self.status, self.headers, self.body)
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import pytest
+
+from hltv_async_api.methods import Matches, Events, Teams, Players, News
+from hltv_async_api.types.Backend import parse_bs4, parse_lxml
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+TZ = 'Europe/Copenhagen'
+
+# extractor name -> (fixture, extractor, args after the page)
+EXTRACTORS = {
+    'get_matches': ('matches.html', Matches(TZ).get_matches, (2, 0)),
+    'get_match_info': ('match.html', Matches(TZ).get_match_info, (2370001, 'Natus Vincere', 'Vitality', 'IEM')),
+    'get_results': ('results.html', Matches(TZ).get_results, (2, 0)),
+    'get_event_results': ('event_results.html', Events.get_event_results, (7148, 2, 10)),
+    'get_event_matches': ('event_matches.html', Events.get_event_matches, (7148, 1, 10)),
+    'get_events': ('events.html', Events.get_events, (True, True, 5)),
+    'get_event_info': ('event.html', Events.get_event_info, (7148, 'iem-cologne-2025')),
+    'get_last_news': ('news.html', News(TZ).get_last_news, ()),
+    'get_top_players': ('players.html', Players.get_top_players, (10,)),
+    'get_player_info': ('player.html', Players.get_player_info, (11893, 'zywoo')),
+    'get_top_teams': ('teams.html', Teams.get_top_teams, (30,)),
+    'get_team_info': ('team.html', Teams.get_team_info, (9565, 'Vitality')),
+}
+
+# fail before reading the page on every backend, parity is still checked on the exception type
+BROKEN = {'get_match_info', 'get_last_news'}
+
+
+def _extract(name, backend):
+    fixture, func, args = EXTRACTORS[name]
+    page = backend((FIXTURES / fixture).read_bytes())
+    try:
+        return func(page, *args)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize('name', EXTRACTORS)
+def test_backends_agree(name):
+    bs4 = _extract(name, parse_bs4)
+    assert _extract(name, parse_lxml) == bs4
+    if name not in BROKEN:
+        assert bs4 and not isinstance(bs4, type), bs4
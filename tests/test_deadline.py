@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from hltv_async_api import Hltv
+from hltv_async_api.types import HltvTimeoutError
+from tests.fakes import FakeTransport
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_backoff_is_not_a_tight_loop():
+    async def main():
+        transport = FakeTransport(503, {'Retry-After': '5'})
+        async with Hltv(transport=transport, max_retries=10) as hltv:
+            start = time.monotonic()
+            result = await hltv.fetch_many(['https://www.hltv.org/matches'], deadline=1.0)
+            return transport.requests, time.monotonic() - start, result
+
+    requests, elapsed, result = _run(main())
+    # no time to wait for Retry-After, the call gives up after the first attempt
+    assert requests == 1
+    assert elapsed < 1.0
+    assert isinstance(result[0], HltvTimeoutError)
+
+
+def test_deadline_bounds_network_attempts():
+    async def main():
+        transport = FakeTransport(latency=0.3, fail=True)
+        async with Hltv(transport=transport, max_retries=5, timeout=5) as hltv:
+            start = time.monotonic()
+            with pytest.raises(HltvTimeoutError):
+                await hltv.get_top_teams(deadline=0.5)
+            return transport.timeouts, time.monotonic() - start
+
+    timeouts, elapsed = _run(main())
+    assert elapsed < 0.7
+    # request timeouts are cut to what is left of the budget
+    assert all(timeout <= 0.5 for timeout in timeouts)
+    assert len(timeouts) <= 2
+
+
+def test_timed_out_call_leaves_no_background_retries():
+    async def main():
+        transport = FakeTransport(latency=0.3, fail=True)
+        async with Hltv(transport=transport, max_retries=5, timeout=5) as hltv:
+            with pytest.raises(HltvTimeoutError):
+                await hltv.get_top_teams(deadline=0.5)
+            requests = transport.requests
+            await asyncio.sleep(1.0)
+            return requests, transport.requests, len(hltv.FLIGHT), len(hltv.PARSER.flight)
+
+    before, after, outer, inner = _run(main())
+    assert after == before
+    assert outer == inner == 0
+
+
+def test_shared_call_runs_until_latest_deadline():
+    async def main():
+        transport = FakeTransport(latency=0.3, fail=True)
+        async with Hltv(transport=transport, max_retries=4, timeout=5) as hltv:
+            short = asyncio.ensure_future(hltv.get_top_teams(deadline=0.1))
+            await asyncio.sleep(0.01)
+            unbounded = asyncio.ensure_future(hltv.get_top_teams())
+            return await asyncio.gather(short, unbounded, return_exceptions=True), transport.timeouts
+
+    (short, unbounded), timeouts = _run(main())
+    assert isinstance(short, HltvTimeoutError)
+    # the caller without deadline got the result of every attempt, not the short caller's timeout
+    assert not isinstance(unbounded, BaseException)
+    assert len(timeouts) == 3
+    # first attempt started under the short deadline, the rest run unbounded
+    assert timeouts[0] <= 0.1 and timeouts[1:] == [5, 5]
@@ -0,0 +1,40 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hltv_async_api.types.Identity import IdentityStore
+
+
+def _store(path):
+    store = IdentityStore('ua', path)
+    store.update('p', ['cf_clearance=abc; Path=/'])
+    return store
+
+
+def test_snapshot_is_a_copy(tmp_path):
+    store = _store(str(tmp_path / 'identities.json'))
+    snapshot = store.snapshot()
+    assert not store.dirty
+    store.update('p', ['cf_clearance=def; Path=/'])
+    assert snapshot['p']['cookies']['cf_clearance'] == 'abc'
+    assert snapshot['p']['cookies'] is not store.get('p').cookies
+
+
+def test_concurrent_dumps(tmp_path):
+    path = tmp_path / 'identities.json'
+    store = _store(str(path))
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: store.dump(store.snapshot()), range(50)))
+    assert json.loads(path.read_text())['p']['cookies']['cf_clearance'] == 'abc'
+    assert os.listdir(tmp_path) == ['identities.json']
+
+
+def test_failed_dump_stays_dirty(tmp_path):
+    store = _store(str(tmp_path / 'missing' / 'identities.json'))
+    store.dump()
+    assert store.dirty
+    store = _store(str(tmp_path / 'identities.json'))
+    store.get('p').cookies['bad'] = object()
+    store.dump()
+    assert store.dirty
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,34 @@
+import asyncio
+from pathlib import Path
+
+from hltv_async_api import Hltv
+from tests.fakes import FakeTransport
+
+
+TEAMS = (Path(__file__).parent / 'fixtures' / 'teams.html').read_bytes()
+BACKFILL = 'https://www.hltv.org/backfill'
+
+
+def test_high_priority_call_does_not_join_low_lane():
+    async def main():
+        transport = FakeTransport(200, body=TEAMS)
+        transport.gates[BACKFILL] = asyncio.Event()
+        async with Hltv(transport=transport, max_retries=2, scheduler_slots=2, scheduler_reserve=1) as hltv:
+            with hltv.priority('low'):
+                # takes the only slot low priority may use
+                backfill = asyncio.ensure_future(hltv.fetch_many([BACKFILL]))
+                await asyncio.sleep(0.05)
+                low = asyncio.ensure_future(hltv.get_top_teams(date_str='2026-10-12'))
+                await asyncio.sleep(0.05)
+            with hltv.priority('high'):
+                high = await asyncio.wait_for(hltv.get_top_teams(date_str='2026-10-12'), 1)
+            waiting = not low.done()
+            transport.gates[BACKFILL].set()
+            await asyncio.gather(backfill, low)
+            return high, waiting, low.result()
+
+    high, waiting, low = asyncio.run(main())
+    assert [team['title'] for team in high] == ['Vitality', 'Spirit', 'MOUZ']
+    # low call still waits for its lane
+    assert waiting
+    assert low == high
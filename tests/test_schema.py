@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from hltv_async_api.methods import Matches, Teams, Players
+from hltv_async_api.types.Backend import parse_bs4, parse_lxml
+
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+TZ = 'Europe/Copenhagen'
+
+
+def _strained(only):
+    return lambda body: parse_bs4(body, only)
+
+
+# bs4, lxml and bs4 built with the Only filter of the method
+PAGES = {
+    'get_matches': ('matches.html', Matches(TZ).get_matches, Matches.matches_only()),
+    'get_top_teams': ('teams.html', Teams.get_top_teams, Teams.top_teams_only()),
+    'get_top_players': ('players.html', Players.get_top_players, Players.top_players_only()),
+}
+
+
+def _extract(name, backend, *args):
+    fixture, func, only = PAGES[name]
+    parse = _strained(only) if backend == 'strained' else backend
+    return func(parse((FIXTURES / fixture).read_bytes()), *args)
+
+
+@pytest.mark.parametrize('backend', [parse_lxml, 'strained'], ids=['lxml', 'strained'])
+@pytest.mark.parametrize('name, args', [
+    ('get_matches', (2, 0)),
+    ('get_matches', (1, 1, False)),
+    ('get_matches', (2, 0, True, False)),
+    ('get_top_teams', (30,)),
+    ('get_top_teams', (2,)),
+    ('get_top_players', (10,)),
+    ('get_top_players', (2,)),
+])
+def test_schema_parity(name, args, backend):
+    assert _extract(name, backend, *args) == _extract(name, parse_bs4, *args)
+
+
+@pytest.mark.parametrize('backend', [parse_bs4, parse_lxml], ids=['bs4', 'lxml'])
+def test_schema_values(backend):
+    matches = _extract('get_matches', backend, 2, 0)
+    assert [m['id'] for m in matches] == ['2370001', '2370002', '2370003', '2370004', '2370005']
+    assert matches[1]['event'] == 'CCT Europe'
+    assert (matches[3]['team1'], matches[3]['t1_id'], matches[3]['event']) == ('TBD', 0, '')
+
+    teams = _extract('get_top_teams', backend, 30)
+    assert [(t['id'], t['rank'], t['title'], t['points']) for t in teams] == [
+        ('vitality', '1', 'Vitality', '1000'), ('spirit', '2', 'Spirit', '912'), ('mouz', '3', 'MOUZ', '805')]
+    assert teams[2]['change'] == ''
+
+    players = _extract('get_top_players', backend, 10)
+    assert [(p['rank'], p['id'], p['team']) for p in players] == [
+        (1, '11893', 'Vitality'), (2, '16920', 'Spirit'), (3, '7998', 'Falcons')]
+    assert players[2]['rating'] == 'ERROR'
+
+
+@pytest.mark.parametrize('backend', [parse_bs4, parse_lxml, 'strained'], ids=['bs4', 'lxml', 'strained'])
+def test_schema_zero_limit(backend):
+    assert _extract('get_matches', backend, 0, 0, False) == []
+    assert _extract('get_top_teams', backend, 0) == []
+    assert _extract('get_top_players', backend, 0) == []
+    assert len(_extract('get_top_players', backend, 1)) == 1